@@ -0,0 +1,348 @@
+"""
+Micro-benchmarks for dbcls hot paths.
+
+Usage:
+    python bench.py lm                                 # LM latency per prediction, all backends
+    python bench.py lm --iterations 5000 --top-k 20
+    python bench.py lm --weights custom.json
+    python bench.py load                               # model load time, JSON vs binary
+    python bench.py suggest --columns 50000            # autocomplete ranking, full sort vs index
+    python bench.py train                              # training samples/sec, python loop vs numpy
+    python bench.py refs --rows 100000 --keys 10000    # merged reference sheet, list scan vs index
+    python bench.py memory --rows 50000 --columns 30   # result row memory, dicts vs compact rows
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+import visidata
+
+from dbcls.autocomplete import (
+    _CONTEXT_LENGTH,
+    _VOCABULARY,
+    _WEIGHTS_PATH,
+    _default_weights_path,
+    _load_weights,
+    _write_weights_bin,
+    AutoComplete,
+    np,
+    predictions_weights,
+)
+from dbcls.clients.base import ColumnarResult, Result
+from dbcls.clients.sqlite3 import Sqlite3Client
+from dbcls.pipeline import PIPELINE_COMMANDS, PIPELINE_COMMAND_HINTS
+from dbcls.vd_modules.vd_utils import reference_rows
+from train import BATCH_SIZE, TrainableModel, train_loop, train_loop_numpy
+
+
+# ── helpers ────────────────────────────────────────────────────────────────────
+
+def timed(fn, iterations: int) -> float:
+    """Return mean seconds per call of fn() over the given number of iterations."""
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def report(rows: list, baseline: str):
+    base = dict(rows)[baseline]
+    for name, seconds in rows:
+        print(f"  {name:<10} {seconds * 1e6:>10.1f} µs   x{base / seconds:>6.1f}")
+
+
+# ── benchmarks ─────────────────────────────────────────────────────────────────
+
+def bench_lm(weights: str, iterations: int, top_k: int):
+    backends = ['python', 'array'] + (['numpy'] if np is not None else [])
+    models = {name: _load_weights(weights, backend=name)[0] for name in backends}
+
+    vocab_size = models['python'].vocab_size
+    rng = random.Random(42)
+    contexts = [[rng.randrange(vocab_size) for _ in range(_CONTEXT_LENGTH)] for _ in range(64)]
+
+    reference = [models['python'].predict(ctx, top_k) for ctx in contexts]
+    for name, model in models.items():
+        got = [model.predict(ctx, top_k) for ctx in contexts]
+        same = all([i for i, _ in a] == [i for i, _ in b] for a, b in zip(reference, got))
+        if not same:
+            print(f"  warning: {name} top-{top_k} differs from the reference (float32 ties?)")
+
+    print(f"LM predict(top_k={top_k})  vocab={vocab_size}  iterations={iterations}")
+    rows = []
+    for name, model in models.items():
+        it = iter(contexts * (iterations // len(contexts) + 2))
+        rows.append((name, timed(lambda: model.predict(next(it), top_k), iterations)))
+    report(rows, 'python')
+
+
+def bench_load(weights: str, iterations: int, scale: int):
+    """Time _load_weights() for JSON and binary copies of a model whose output
+    layer is padded to `scale` times the vocabulary."""
+    with open(weights) as fh:
+        payload = json.load(fh)
+    hyper = dict(payload['hyper'])
+    vocab = payload['vocab']
+    w = dict(payload['weights'])
+    if scale > 1:
+        hyper['vocab_size'] *= scale
+        w['output_weights'] = w['output_weights'] * scale
+        w['output_bias'] = w['output_bias'] * scale
+    payload = {'hyper': hyper, 'vocab': vocab, 'weights': w}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'weights.json')
+        bin_path = os.path.join(tmp, 'weights.bin')
+        with open(json_path, 'w') as fh:
+            json.dump(payload, fh)
+        _write_weights_bin(bin_path, hyper, vocab, w)
+
+        print(f"Model load  vocab={hyper['vocab_size']}  "
+              f"json={os.path.getsize(json_path) // 1024} KiB  bin={os.path.getsize(bin_path) // 1024} KiB")
+        rows = []
+        for backend in ['python'] + (['numpy'] if np is not None else []):
+            rows.append((f'json/{backend}', timed(lambda: _load_weights(json_path, backend), iterations)))
+            rows.append((f'bin/{backend}', timed(lambda: _load_weights(bin_path, backend), iterations)))
+        report(rows, 'json/python')
+
+
+def bench_suggest(columns: int, iterations: int):
+    """Rank suggestions for a statement over a table with `columns` columns,
+    from a pre-filled schema cache (no server round-trips)."""
+    # In-memory: no on-disk schema cache, so the fake columns stay in this process
+    client = Sqlite3Client('')
+    ac = AutoComplete(client)
+    db = client.dbname
+    names = [f'col_{i:06d}' for i in range(columns)]
+    ac.cache.set([db])
+    ac.cache.set(['wide', 'users'], database=db)
+    ac.cache.set(names, database=db, table_name='wide')
+    ac.cache.set(['id', 'name'], database=db, table_name='users')
+
+    full_sql = 'SELECT col_0001 FROM wide WHERE col_00'
+    sql_context = 'SELECT col_0001 FROM wide WHERE'
+    parts = ['col_00']
+    loop = asyncio.new_event_loop()
+
+    async def full_sort():
+        # The pre-index pipeline: rebuild every tuple, sort everything
+        word = parts[-1]
+        suggestions = [(x, f"{x} (COMMAND)", '') for x in client.all_commands]
+        suggestions += [(x, f"{x} (FUNCTION)", '') for x in await ac.get_all_functions()]
+        suggestions += [
+            (f'.{cmd.upper()}', f'.{cmd.upper()} (PIPELINE)', PIPELINE_COMMAND_HINTS.get(cmd, ''))
+            for cmd in PIPELINE_COMMANDS
+        ]
+        suggestions += [(c, f"wide.{c} (COLUMN)", '') for c in await ac.get_cached_columns('wide')]
+        suggestions += [(x, f"{x} (DATABASE)", '') for x in sorted(await ac.get_cached_databases())]
+        suggestions += [(x, f"{x} (TABLE)", '') for x in sorted(await ac.get_cached_tables())]
+        rank_map = ac._get_lm_rank_map(sql_context)
+        return sorted(suggestions, key=lambda c: predictions_weights(
+            word, c[1], ac._candidate_lm_rank(c[1], rank_map)))
+
+    def indexed():
+        return loop.run_until_complete(ac.get_suggestions(parts, sql_context=sql_context, full_sql=full_sql))
+
+    expected = loop.run_until_complete(full_sort())
+    got = indexed()
+    if got[:ac.TOP_N] != expected[:ac.TOP_N]:
+        print("  warning: indexed top-N differs from the full sort")
+    if sorted(got) != sorted(expected):
+        print("  warning: indexed candidate set differs from the full sort")
+
+    print(f"Suggestions  columns={columns}  candidates={len(expected)}  top_n={ac.TOP_N}")
+    rows = [
+        ('sort', timed(lambda: loop.run_until_complete(full_sort()), iterations)),
+        ('index', timed(indexed, iterations)),
+    ]
+    report(rows, 'sort')
+    loop.close()
+
+
+def bench_train(samples: int, batch_size: int):
+    """One training epoch over random samples, per trainer."""
+    vocab_size = max(_VOCABULARY) + 1
+    rng = random.Random(42)
+    data = [
+        ([rng.randrange(vocab_size) for _ in range(_CONTEXT_LENGTH)], rng.randrange(vocab_size))
+        for _ in range(samples)
+    ]
+
+    trainers = [('python', lambda m, d: train_loop(m, d, 1, 0.01))]
+    if np is not None:
+        trainers.append(('numpy', lambda m, d: train_loop_numpy(m, d, 1, 0.01, batch_size)))
+
+    print(f"Training epoch  vocab={vocab_size}  samples={samples}  batch={batch_size}")
+    rows = []
+    for name, train in trainers:
+        random.seed(0)
+        model = TrainableModel(vocab_size)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            train(model, list(data))
+        seconds = (time.perf_counter() - start) / samples
+        rows.append((name, seconds))
+    report(rows, 'python')
+    for name, seconds in rows:
+        print(f"  {name:<10} {1 / seconds:>10.0f} samples/s")
+
+
+def bench_refs(rows: int, keys: int, sample: int):
+    """Rows of a merged reference sheet (as opened by openRefCells) for
+    `keys` selected keys over a source sheet of `rows` rows."""
+    source = visidata.PyobjSheet('source', source=[{'id': i % (rows // 2), 'value': i} for i in range(rows)])
+    visidata.vd.sync(source.reload())
+    fields = ('id',)
+    rng = random.Random(42)
+    values = [(v,) for v in rng.sample(range(rows // 2), keys)]
+
+    def list_scan(sheet_rows):
+        # The previous ReferenceSheet.iterload: list membership per source row
+        return [lcr.row for lcr in sheet_rows if tuple(getattr(lcr, f) for f in fields) in values]
+
+    def indexed():
+        return reference_rows(source, fields, values)
+
+    lazy_rows = list(source)
+    expected = list_scan(lazy_rows[:sample])
+    if indexed()[:len(expected)] != expected:
+        print("  warning: indexed rows differ from the list scan")
+
+    print(f"Merged reference  rows={rows}  keys={keys}  (list scan timed on {sample} rows, scaled)")
+    start = time.perf_counter()
+    list_scan(lazy_rows[:sample])
+    rows_list = [('list', (time.perf_counter() - start) * rows / sample)]
+    rows_list.append(('index', timed(indexed, 3)))
+    report(rows_list, 'list')
+
+
+def retained(fn):
+    """Return (fn(), bytes allocated by fn() and still alive afterwards)."""
+    tracemalloc.start()
+    try:
+        value = fn()
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, size
+
+
+def bench_memory(rows: int, columns: int):
+    """Bytes per row spent on row structure (the decoded values are shared by
+    every layout and not counted), for each way an engine hands rows over."""
+    client = Sqlite3Client('')
+    conn = client.get_connection()
+    names = [f'col_{i}' for i in range(columns)]
+    kinds = ['integer', 'text', 'real']
+    conn.execute('CREATE TABLE wide (%s)' % ', '.join(
+        f'{name} {kinds[i % 3]}' for i, name in enumerate(names)))
+    rng = random.Random(42)
+    conn.executemany('INSERT INTO wide VALUES (%s)' % ', '.join('?' * columns), (
+        [rng.randrange(10**6) if i % 3 == 0 else f'v{rng.randrange(1000)}' if i % 3 == 1 else rng.random()
+         for i in range(columns)]
+        for _ in range(rows)))
+    # Driver output: one tuple per row, as sqlite3/aiomysql/psycopg2/cassandra decode it
+    raw = conn.execute('SELECT * FROM wide').fetchall()
+    tuple_bytes = sum(sys.getsizeof(row) for row in raw)
+
+    def columnar():
+        cols = [array('q', col) if i % 3 == 0 else array('d', col) if i % 3 == 2 else list(col)
+                for i, col in enumerate(zip(*raw))]
+        result = ColumnarResult(names, cols)
+        return result, result.view_rows()
+
+    _, dict_bytes = retained(lambda: [dict(zip(names, row)) for row in raw])
+    # Compact rows keep the driver's tuples alive, so those count against them
+    result, row_bytes = retained(lambda: Result.from_tuples(names, raw))
+    _, columnar_bytes = retained(columnar)
+    live = client._execute_sync('SELECT * FROM wide')
+
+    print(f"Result memory  rows={rows}  columns={columns}  (values excluded)")
+    base = dict_bytes / rows
+    for name, size in [
+        ('dicts', dict_bytes),
+        ('rows', row_bytes + tuple_bytes),
+        ('columnar', columnar_bytes),
+    ]:
+        print(f"  {name:<10} {size / rows:>10.0f} B/row   x{base / (size / rows):>6.1f}")
+    if [dict(row) for row in live.data[:100]] != [dict(zip(names, row)) for row in raw[:100]]:
+        print("  warning: Sqlite3Client rows differ from the driver tuples")
+    print("  rows: sqlite3, MySQL, PostgreSQL, Cassandra   columnar: ClickHouse")
+    # Only the sqlite3 driver runs here; the other engines' drivers hand over
+    # the same per-row tuples, so their figures are inferred from these
+    print("  measured on sqlite3 output; other engines inferred from the same tuple rows")
+
+
+# ── entry point ────────────────────────────────────────────────────────────────
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for dbcls hot paths')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    lm_parser = subparsers.add_parser('lm', help='Autocomplete language-model inference latency')
+    lm_parser.add_argument('--weights',    metavar='FILE', default=_default_weights_path(),
+                           help=f'Weights file to load (default: {_default_weights_path()})')
+    lm_parser.add_argument('--iterations', type=int, default=2000,
+                           help='Predictions per backend (default: 2000)')
+    lm_parser.add_argument('--top-k',      type=int, default=20, dest='top_k',
+                           help='Predictions requested per call (default: 20)')
+
+    load_parser = subparsers.add_parser('load', help='Model load time, JSON vs binary weights')
+    load_parser.add_argument('--weights',    metavar='FILE', default=_WEIGHTS_PATH,
+                             help=f'JSON weights to start from (default: {_WEIGHTS_PATH})')
+    load_parser.add_argument('--iterations', type=int, default=20,
+                             help='Loads per format (default: 20)')
+    load_parser.add_argument('--scale',      type=int, default=100,
+                             help='Inflate the output layer this many times (default: 100)')
+
+    suggest_parser = subparsers.add_parser('suggest', help='Autocomplete ranking latency on a wide table')
+    suggest_parser.add_argument('--columns',    type=int, default=50000,
+                                help='Columns in the referenced table (default: 50000)')
+    suggest_parser.add_argument('--iterations', type=int, default=20,
+                                help='Requests per strategy (default: 20)')
+
+    train_parser = subparsers.add_parser('train', help='Training throughput, python loop vs numpy mini-batches')
+    train_parser.add_argument('--samples',    type=int, default=5000,
+                              help='Samples in the epoch (default: 5000)')
+    train_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, dest='batch_size',
+                              help=f'Mini-batch size for numpy (default: {BATCH_SIZE})')
+
+    refs_parser = subparsers.add_parser('refs', help='Merged reference sheet over many selected keys')
+    refs_parser.add_argument('--rows',   type=int, default=100000,
+                             help='Rows in the source sheet (default: 100000)')
+    refs_parser.add_argument('--keys',   type=int, default=10000,
+                             help='Selected reference keys (default: 10000)')
+    refs_parser.add_argument('--sample', type=int, default=2000,
+                             help='Source rows the list scan is timed on (default: 2000)')
+
+    memory_parser = subparsers.add_parser('memory', help='Result row memory, dicts vs compact rows')
+    memory_parser.add_argument('--rows',    type=int, default=50000,
+                               help='Rows in the result (default: 50000)')
+    memory_parser.add_argument('--columns', type=int, default=30,
+                               help='Columns in the result (default: 30)')
+
+    args = parser.parse_args()
+
+    if args.command == 'lm':
+        bench_lm(args.weights, args.iterations, args.top_k)
+    elif args.command == 'load':
+        bench_load(args.weights, args.iterations, args.scale)
+    elif args.command == 'suggest':
+        bench_suggest(args.columns, args.iterations)
+    elif args.command == 'train':
+        bench_train(args.samples, args.batch_size)
+    elif args.command == 'refs':
+        bench_refs(args.rows, args.keys, args.sample)
+    elif args.command == 'memory':
+        bench_memory(args.rows, args.columns)
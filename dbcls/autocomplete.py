@@ -1,16 +1,33 @@
 import os
 import json
+import asyncio
+import heapq
 import math
+import mmap
+import re
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from operator import mul
 from time import time
-from typing import List, Optional, Tuple, Union
+from typing import Optional, Union
 
 import sql_metadata
 from sql_metadata.keywords_lists import TokenType
 
+try:
+    import numpy as np
+except ImportError:  # optional: inference falls back to array-backed pure Python
+    np = None
+
 from .pipeline import PIPELINE_COMMANDS, PIPELINE_COMMAND_HINTS
 
 _CONTEXT_LENGTH = 3
 _WEIGHTS_PATH = os.path.join(os.path.dirname(__file__), 'weights.json')
+_WEIGHTS_BIN_PATH = os.path.join(os.path.dirname(__file__), 'weights.bin')
 
 _VOCABULARY = {
     0: '',
@@ -138,18 +155,13 @@ def _softmax(logits: list) -> list:
     return [x / total for x in exp_values]
 
 
-def _tokenize_sql(sql: str, vocab_values: set) -> list:
-    """Normalize SQL string into structural tokens. Returns [] on failure."""
+def _structural_tokens(parsed_tokens: list, vocab_values: set) -> list:
+    """Map sql_metadata tokens onto the model's structural vocabulary."""
     def add_token(result_tokens, token):
         if token in vocab_values:
             result_tokens.append(token)
 
     result_tokens = []
-    try:
-        parsed_tokens = sql_metadata.Parser(sql).tokens
-    except Exception:
-        return []
-
     for token in parsed_tokens:
         token_value = token.value.upper()
         if token.is_keyword and 'JOIN' in token_value:
@@ -179,6 +191,157 @@ def _tokenize_sql(sql: str, vocab_values: set) -> list:
     return result_tokens
 
 
+def _tokenize_sql(sql: str, vocab_values: set) -> list:
+    """Normalize SQL string into structural tokens. Returns [] on failure."""
+    try:
+        parsed_tokens = sql_metadata.Parser(sql).tokens
+    except Exception:
+        return []
+    return _structural_tokens(parsed_tokens, vocab_values)
+
+
+# ── statement analysis ────────────────────────────────────────────────────────
+
+class SqlAnalysis:
+    """Everything autocomplete needs from one statement, from a single parse.
+
+    sql_metadata memoises its token list on the Parser, so tables, aliases
+    and CTE names all derive from the same tokenization.  Each attribute is
+    computed on first access and failures degrade to empty values.  Use
+    analyze_sql() rather than constructing this directly.
+    """
+    __slots__ = ('sql', '_parser', '_tokens', '_tokens_vocab', '_tables', '_aliases', '_ctes')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self._parser = sql_metadata.Parser(sql)
+        self._tokens = None
+        self._tokens_vocab = None
+        self._tables = None
+        self._aliases = None
+        self._ctes = None
+
+    def _get(self, attr: str, default):
+        if not self.sql.strip():
+            return default
+        try:
+            return getattr(self._parser, attr)
+        except Exception:
+            return default
+
+    def tokens(self, vocab_values: set) -> list:
+        """Structural tokens for the language model."""
+        if self._tokens is None or self._tokens_vocab is not vocab_values:
+            self._tokens = _structural_tokens(self._get('tokens', []), vocab_values)
+            self._tokens_vocab = vocab_values
+        return self._tokens
+
+    @property
+    def ctes(self) -> list[str]:
+        """Names defined by WITH clauses."""
+        if self._ctes is None:
+            self._ctes = list(self._get('with_names', []))
+        return self._ctes
+
+    @property
+    def tables(self) -> list[str]:
+        """Referenced tables, excluding CTE names."""
+        if self._tables is None:
+            ctes = {x.lower() for x in self.ctes}
+            self._tables = [t for t in self._get('tables', []) if t.lower() not in ctes]
+        return self._tables
+
+    @property
+    def aliases(self) -> dict:
+        """Lower-cased alias -> table name."""
+        if self._aliases is None:
+            self._aliases = {
+                alias.lower(): table
+                for alias, table in self._get('tables_aliases', {}).items()
+            }
+        return self._aliases
+
+
+_ANALYSIS_CACHE_SIZE = 64
+_analysis_cache: OrderedDict = OrderedDict()
+
+
+def analyze_sql(sql: str) -> SqlAnalysis:
+    """Return the (shared, cached) analysis of *sql*."""
+    analysis = _analysis_cache.get(sql)
+    if analysis is None:
+        analysis = SqlAnalysis(sql)
+        _analysis_cache[sql] = analysis
+        while len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    else:
+        _analysis_cache.move_to_end(sql)
+    return analysis
+
+
+# Clause keywords after which tokens classify (almost) independently of the
+# text before them, with a minimal lead-in that gives the parser a valid
+# statement to attach the clause to.
+_CLAUSE_RE = re.compile(
+    r'\b(SELECT|FROM|WHERE|(?:(?:LEFT|RIGHT|FULL|INNER|OUTER|CROSS)\s+)*JOIN|'
+    r'GROUP\s+BY|ORDER\s+BY|HAVING|LIMIT|UNION|SET|VALUES|AND|OR)\b',
+    re.IGNORECASE,
+)
+_CLAUSE_LEAD_IN = {
+    'SELECT': '',
+    'FROM':   'SELECT x ',
+    'SET':    'UPDATE t ',
+    'VALUES': 'INSERT INTO t ',
+    'AND':    'SELECT x FROM t WHERE x = 1 ',
+    'OR':     'SELECT x FROM t WHERE x = 1 ',
+}
+_DEFAULT_LEAD_IN = 'SELECT x FROM t '
+
+
+class _TailTokenizer:
+    """Tokenizes only as much of a statement as the model needs.
+
+    The text is split at its last clause keyword.  The tail is tokenized
+    behind a tiny synthetic lead-in (e.g. ``SELECT x FROM t`` before a
+    ``WHERE``) whose tokens are then dropped, so its cost does not grow with
+    the statement.  Only when the tail is too short for a full model context
+    is the head needed; it goes through analyze_sql(), so completions inside
+    one clause never re-parse the earlier clauses.
+    """
+
+    def __init__(self, vocab_values: set):
+        self.vocab_values = vocab_values
+        self._lead_ins = {
+            lead: _tokenize_sql(lead, vocab_values)
+            for lead in set(_CLAUSE_LEAD_IN.values()) | {_DEFAULT_LEAD_IN} if lead
+        }
+
+    def _tail_tokens(self, keyword: str, tail: str) -> Optional[list]:
+        keyword = keyword.split()[-1].upper()
+        lead = _CLAUSE_LEAD_IN.get(keyword, _DEFAULT_LEAD_IN)
+        tokens = _tokenize_sql(lead + tail, self.vocab_values)
+        if not lead:
+            return tokens
+        lead_tokens = self._lead_ins[lead]
+        if tokens[:len(lead_tokens)] != lead_tokens:
+            return None
+        return tokens[len(lead_tokens):]
+
+    def tail(self, sql: str, count: int = _CONTEXT_LENGTH) -> list:
+        """Return the last *count* tokens of *sql* (fewer if it has fewer)."""
+        last = None
+        for last in _CLAUSE_RE.finditer(sql):
+            pass
+        if last is None or last.start() == 0:
+            return analyze_sql(sql).tokens(self.vocab_values)[-count:]
+        tokens = self._tail_tokens(last.group(1), sql[last.start():])
+        if tokens is None:
+            return analyze_sql(sql).tokens(self.vocab_values)[-count:]
+        if len(tokens) < count:
+            tokens = analyze_sql(sql[:last.start()]).tokens(self.vocab_values) + tokens
+        return tokens[-count:]
+
+
 class _SQLModel:
     """Minimal inference-only MLP. Created only via _load_weights()."""
     __slots__ = (
@@ -217,14 +380,173 @@ class _SQLModel:
         return [(i, probs[i]) for i in sorted_indices[:top_k]]
 
 
-def _load_weights(path: str = _WEIGHTS_PATH):
-    """Load model weights from JSON. Returns (model, token_to_index, index_to_token)."""
-    with open(path) as fh:
-        payload = json.load(fh)
+class _ArraySQLModel(_SQLModel):
+    """Same MLP over float32 arrays, one array('f') per weight row, so the dot
+    products run as C-level sum(map(mul, ...)) instead of index loops."""
+    __slots__ = ('_hidden_rows', '_output_rows', '_embeddings')
 
-    hyper = payload['hyper']
-    token_to_index = payload['vocab']['token_to_index']
-    index_to_token = {int(k): v for k, v in payload['vocab']['index_to_token'].items()}
+    def __init__(self, model: _SQLModel):
+        for name in _SQLModel.__slots__:
+            setattr(self, name, getattr(model, name))
+        self._embeddings = array('f', self.embedding_matrix)
+        self._hidden_rows = self._rows(self.hidden_weights, self.hidden_size, self.input_dim)
+        self._output_rows = self._rows(self.output_weights, self.vocab_size, self.hidden_size)
+
+    @staticmethod
+    def _rows(values, rows: int, cols: int) -> list:
+        return [array('f', values[i * cols: (i + 1) * cols]) for i in range(rows)]
+
+    def forward(self, context_indices: list) -> list:
+        dim = self.embed_dim
+        input_embeddings = []
+        for token_idx in context_indices:
+            input_embeddings.extend(self._embeddings[token_idx * dim: (token_idx + 1) * dim])
+        hidden_activations = [
+            math.tanh(bias + sum(map(mul, row, input_embeddings)))
+            for row, bias in zip(self._hidden_rows, self.hidden_bias)
+        ]
+        logits = [
+            bias + sum(map(mul, row, hidden_activations))
+            for row, bias in zip(self._output_rows, self.output_bias)
+        ]
+        return _softmax(logits)
+
+    def predict(self, context_indices: list, top_k: int = 5) -> list:
+        probs = self.forward(context_indices)
+        top = heapq.nlargest(top_k, range(len(probs)), key=probs.__getitem__)
+        return [(i, probs[i]) for i in top]
+
+
+class _NumpySQLModel(_SQLModel):
+    """Vectorised MLP: two mat-vec products and an argpartition top-k."""
+    __slots__ = ('_embeddings', '_hidden_w', '_hidden_b', '_output_w', '_output_b')
+
+    def __init__(self, model: _SQLModel):
+        for name in _SQLModel.__slots__:
+            setattr(self, name, getattr(model, name))
+        f32 = np.float32
+        self._embeddings = np.asarray(self.embedding_matrix, dtype=f32).reshape(-1, self.embed_dim)
+        self._hidden_w = np.asarray(self.hidden_weights, dtype=f32).reshape(self.hidden_size, self.input_dim)
+        self._hidden_b = np.asarray(self.hidden_bias, dtype=f32)
+        self._output_w = np.asarray(self.output_weights, dtype=f32).reshape(self.vocab_size, self.hidden_size)
+        self._output_b = np.asarray(self.output_bias, dtype=f32)
+
+    def _probs(self, context_indices: list):
+        x = self._embeddings[context_indices].ravel()
+        hidden = np.tanh(self._hidden_w @ x + self._hidden_b)
+        logits = self._output_w @ hidden + self._output_b
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    def forward(self, context_indices: list) -> list:
+        return self._probs(context_indices).tolist()
+
+    def predict(self, context_indices: list, top_k: int = 5) -> list:
+        probs = self._probs(context_indices)
+        if top_k < len(probs):
+            top = np.argpartition(probs, -top_k)[-top_k:]
+        else:
+            top = np.arange(len(probs))
+        top = top[np.argsort(-probs[top], kind='stable')]
+        return [(int(i), float(probs[i])) for i in top]
+
+
+def _vectorize(model: _SQLModel, backend: str = None) -> _SQLModel:
+    """Wrap a freshly loaded model in the fastest available backend
+    ('numpy', 'array' or 'python')."""
+    if backend is None:
+        backend = 'numpy' if np is not None else 'array'
+    if backend == 'numpy':
+        return _NumpySQLModel(model)
+    if backend == 'array':
+        return _ArraySQLModel(model)
+    return model
+
+
+# Binary weights: magic, header length, JSON header (hyper, vocab, array
+# offsets), then little-endian float32 arrays aligned to _BIN_ALIGN bytes.
+_BIN_MAGIC = b'DBLMW001'
+_BIN_ALIGN = 64
+_WEIGHT_NAMES = ('embedding_matrix', 'hidden_weights', 'hidden_bias', 'output_weights', 'output_bias')
+
+
+def _default_weights_path() -> str:
+    return _WEIGHTS_BIN_PATH if os.path.exists(_WEIGHTS_BIN_PATH) else _WEIGHTS_PATH
+
+
+def _write_weights_bin(path: str, hyper: dict, vocab: dict, weights: dict):
+    """Write weights in the binary format read by _load_weights()."""
+    arrays = {name: array('f', weights[name]) for name in _WEIGHT_NAMES}
+    if sys.byteorder != 'little':
+        for values in arrays.values():
+            values.byteswap()
+
+    def header_bytes(offsets):
+        return json.dumps({'hyper': hyper, 'vocab': vocab, 'arrays': offsets}).encode()
+
+    def align(n):
+        return -(-n // _BIN_ALIGN) * _BIN_ALIGN
+
+    # Offsets depend on the header size, which depends on the offsets: size the
+    # header with placeholder offsets of the final width, then fill them in.
+    placeholder = {name: [10 ** 12, len(values)] for name, values in arrays.items()}
+    pos = align(len(_BIN_MAGIC) + 4 + len(header_bytes(placeholder)))
+    offsets = {}
+    for name, values in arrays.items():
+        offsets[name] = [pos, len(values)]
+        pos = align(pos + len(values) * 4)
+    header = header_bytes(offsets)
+
+    with open(path, 'wb') as fh:
+        fh.write(_BIN_MAGIC + struct.pack('<I', len(header)) + header)
+        for name, values in arrays.items():
+            fh.write(b'\0' * (offsets[name][0] - fh.tell()))
+            fh.write(values.tobytes())
+
+
+def _read_weights_bin(path: str):
+    """Map a binary weights file. Returns (hyper, vocab, {name: float32 memoryview});
+    the views point straight into the page cache."""
+    with open(path, 'rb') as fh:
+        buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    if buf[:len(_BIN_MAGIC)] != _BIN_MAGIC:
+        raise ValueError(f'{path}: not a binary weights file')
+    start = len(_BIN_MAGIC) + 4
+    (header_len,) = struct.unpack_from('<I', buf, len(_BIN_MAGIC))
+    header = json.loads(bytes(buf[start:start + header_len]))
+
+    view = memoryview(buf)
+    weights = {}
+    for name, (offset, count) in header['arrays'].items():
+        values = view[offset:offset + count * 4].cast('f')
+        if sys.byteorder != 'little':
+            swapped = array('f', values.tobytes())
+            swapped.byteswap()
+            values = memoryview(swapped)
+        weights[name] = values
+    return header['hyper'], header['vocab'], weights
+
+
+def _is_weights_bin(path: str) -> bool:
+    with open(path, 'rb') as fh:
+        return fh.read(len(_BIN_MAGIC)) == _BIN_MAGIC
+
+
+def _load_weights(path: str = None, backend: str = None):
+    """Load model weights from the binary format or JSON.
+    Returns (model, token_to_index, index_to_token)."""
+    if path is None:
+        path = _default_weights_path()
+
+    if _is_weights_bin(path):
+        hyper, vocab, w = _read_weights_bin(path)
+    else:
+        with open(path) as fh:
+            payload = json.load(fh)
+        hyper, vocab, w = payload['hyper'], payload['vocab'], payload['weights']
+
+    token_to_index = vocab['token_to_index']
+    index_to_token = {int(k): v for k, v in vocab['index_to_token'].items()}
 
     model = _SQLModel.__new__(_SQLModel)
     model.vocab_size = hyper['vocab_size']
@@ -232,24 +554,21 @@ def _load_weights(path: str = _WEIGHTS_PATH):
     model.hidden_size = hyper['hidden_size']
     model.input_dim = hyper['context_length'] * hyper['embed_dim']
 
-    w = payload['weights']
     model.embedding_matrix = w['embedding_matrix']
     model.hidden_weights = w['hidden_weights']
     model.hidden_bias = w['hidden_bias']
     model.output_weights = w['output_weights']
     model.output_bias = w['output_bias']
 
-    return model, token_to_index, index_to_token
+    return _vectorize(model, backend), token_to_index, index_to_token
 
 
-def _get_tables_from_sql(sql: str) -> list[str]:
-    """Extract table names from SQL using sql_metadata. Returns [] on failure."""
-    if not sql or not sql.strip():
-        return []
-    try:
-        return sql_metadata.Parser(sql).tables
-    except Exception:
-        return []
+def _context_indices(tokens: list, token_to_index: dict) -> list:
+    """Model input for the next-token prediction: the last _CONTEXT_LENGTH
+    token indices, left-padded with 0."""
+    unknown_index = 0
+    indices = [token_to_index.get(t, unknown_index) for t in tokens][-_CONTEXT_LENGTH:]
+    return [0] * (_CONTEXT_LENGTH - len(indices)) + indices
 
 
 def _predict_next(
@@ -261,10 +580,8 @@ def _predict_next(
     top_k: int = 20,
 ) -> list:
     """Return top-k (token_name, probability) predictions for the next SQL token."""
-    unknown_index = 0
     tokens = _tokenize_sql(sql_input, vocab_values)
-    indices = [token_to_index.get(t, unknown_index) for t in tokens][-_CONTEXT_LENGTH:]
-    padded = [0] * (_CONTEXT_LENGTH - len(indices)) + indices
+    padded = _context_indices(tokens, token_to_index)
     return [
         (index_to_token[idx], prob)
         for idx, prob in model.predict(padded, top_k)
@@ -292,71 +609,436 @@ def predictions_weights(query: str, candidate: str, lm_rank: int = 999) -> tuple
 
 # ── cache ─────────────────────────────────────────────────────────────────────
 
+def _default_cache_path() -> str:
+    base = os.environ.get('DBCLS_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'dbcls'
+    )
+    return os.path.join(base, 'schema.sqlite3')
+
+
+class SchemaStore:
+    """On-disk copy of DbStructureCache, shared by every dbcls process.
+
+    Entries are rows of (server, database, table) -> JSON list plus the
+    table's version string; ``database == ''`` holds the database list and
+    ``table == ''`` a database's table list.
+    """
+
+    def __init__(self, path: str, server: str):
+        self.server = server
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' server TEXT, db TEXT, tbl TEXT, value TEXT, version TEXT, updated REAL,'
+            ' PRIMARY KEY (server, db, tbl))'
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_client(cls, client, path: str = None) -> Optional['SchemaStore']:
+        server = client.get_cache_key()
+        if not server:
+            return None
+        try:
+            return cls(path or _default_cache_path(), server)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def load(self) -> list[tuple]:
+        """Return all (db, table, value, version, updated) rows for this server,
+        oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT db, tbl, value, version, updated FROM entries WHERE server = ? ORDER BY updated',
+                (self.server,),
+            ).fetchall()
+        return [(db, tbl, json.loads(value), version, updated) for db, tbl, value, version, updated in rows]
+
+    def get(self, database: str, table: str) -> Optional[tuple]:
+        """Return (value, version, updated) for one entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, version, updated FROM entries WHERE server = ? AND db = ? AND tbl = ?',
+                (self.server, database, table),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def save(self, items: list[tuple]):
+        """Upsert (db, table, value, version) rows in one transaction."""
+        now = time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                        [(self.server, db, tbl, json.dumps(value), version, now)
+                         for db, tbl, value, version in items],
+                    )
+            except sqlite3.Error:
+                pass
+
+    def delete(self, database: str, tables: list[str]):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        'DELETE FROM entries WHERE server = ? AND db = ? AND tbl = ?',
+                        [(self.server, database, t) for t in tables],
+                    )
+            except sqlite3.Error:
+                pass
+
+
 class DbStructureCache:
+    """Databases, tables and columns seen on the server.
+
+    Entries older than CACHE_TTL are *stale*: ``lookup`` still returns them so
+    the caller can answer at once and refresh in the background.  Lookups
+    that found nothing are remembered for NEGATIVE_TTL.  Column entries are
+    bounded to MAX_TABLES in LRU order; evicted ones are re-read from the
+    on-disk store if there is one.
+    """
+
     CACHE_TTL = 300
+    NEGATIVE_TTL = 30
+    MAX_TABLES = 20000
 
-    def __init__(self):
+    FRESH = 'fresh'
+    STALE = 'stale'
+    MISS = 'miss'
+
+    def __init__(self, store: Optional[SchemaStore] = None):
         self.cache = {
             "databases": {},
             "tables": {},
             "columns": {}
         }
-
-    def get(self, database: str = None, table: str = None) -> list[str]:
-        now = time()
+        # database -> {table: version} as last seen on the server
+        self.versions: dict = {}
+        self._lru: OrderedDict = OrderedDict()   # (database, table) of column entries
+        self.store = store
+        if store is not None:
+            self._load_store()
+
+    def _load_store(self):
+        # Served as-is on start-up; entries past their TTL come back stale and
+        # get refreshed on first use (prefetch_schema revalidates the rest).
+        for db, tbl, value, version, updated in self.store.load():
+            entry = {"list": value, "last_updated": updated}
+            if not db:
+                self.cache['databases'] = entry
+            elif not tbl:
+                self.cache['tables'][db] = entry
+            else:
+                self._put_columns(db, tbl, entry)
+                if version is not None:
+                    self.versions.setdefault(db, {})[tbl] = version
+
+    def _put_columns(self, database: str, table: str, entry: dict):
+        self.cache['columns'].setdefault(database, {})[table] = entry
+        key = (database, table)
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.MAX_TABLES:
+            db, tbl = self._lru.popitem(last=False)[0]
+            self.cache['columns'].get(db, {}).pop(tbl, None)
+
+    def _entry(self, database: str = None, table: str = None) -> Optional[dict]:
         if database is None:
-            if not self.cache['databases'] or now - self.cache['databases'].get('last_updated', 0) > self.CACHE_TTL:
-                return None
-            return self.cache['databases']['list']
+            return self.cache['databases'] or None
         if table is None:
-            if (
-                database in self.cache['tables'] and
-                now - self.cache['tables'].get(database, {}).get('last_updated', 0) > self.CACHE_TTL
-            ):
-                return None
-
-            return self.cache['tables'].get(database, {}).get('list', None)
-
-        if (
-            database not in self.cache['columns'] or
-            table not in self.cache['columns'][database] or
-            now - self.cache['columns'][database][table].get('last_updated', 0) > self.CACHE_TTL
-        ):
+            return self.cache['tables'].get(database)
+        entry = self.cache['columns'].get(database, {}).get(table)
+        if entry is not None:
+            self._lru.move_to_end((database, table))
+        return entry
+
+    def _from_store(self, database: str = None, table: str = None) -> Optional[dict]:
+        if self.store is None:
             return None
+        row = self.store.get(database or '', table or '')
+        if row is None:
+            return None
+        value, version, updated = row
+        entry = {"list": value, "last_updated": updated}
+        if table is not None:
+            self._put_columns(database, table, entry)
+            if version is not None:
+                self.versions.setdefault(database, {})[table] = version
+        elif database is not None:
+            self.cache['tables'][database] = entry
+        else:
+            self.cache['databases'] = entry
+        return entry
+
+    def lookup(self, database: str = None, table: str = None) -> tuple:
+        """Return (value, state) where state is FRESH, STALE or MISS."""
+        entry = self._entry(database, table)
+        if entry is None and table is not None:
+            entry = self._from_store(database, table)
+        if entry is None:
+            return None, self.MISS
+        age = time() - entry.get('last_updated', 0)
+        if entry.get('negative'):
+            return (entry['list'], self.FRESH) if age <= self.NEGATIVE_TTL else (None, self.MISS)
+        return entry['list'], (self.FRESH if age <= self.CACHE_TTL else self.STALE)
 
-        return self.cache['columns'].get(database, {}).get(table, {}).get('list', None)
-
-    def set(self, value: list[str], database: str = None, table_name: str = None):
+    def get(self, database: str = None, table: str = None) -> list[str]:
+        value, state = self.lookup(database, table)
+        return value if state == self.FRESH else None
+
+    def has_table(self, database: str, table: str) -> Optional[bool]:
+        """Whether *table* is in the cached table list (case-insensitively);
+        None if the list is not known or not fresh (a stale list may predate
+        the table)."""
+        value, state = self.lookup(database)
+        if state != self.FRESH or value is None:
+            return None
+        entry = self.cache['tables'][database]
+        names = entry.get('names')
+        if names is None:
+            names = entry['names'] = frozenset(t.lower() for t in entry['list'])
+        return table.lower() in names
+
+    def set(self, value: list[str], database: str = None, table_name: str = None,
+            version: str = None, negative: bool = False):
+        entry = {"list": value, "last_updated": time()}
+        if negative:
+            entry['negative'] = True
         if database is None and table_name is None:
-            self.cache['databases'] = {
-                "list": value,
-                "last_updated": time()
-            }
+            self.cache['databases'] = entry
         elif table_name is None:
-            self.cache['tables'][database] = {
-                "list": value,
-                "last_updated": time()
-            }
+            self.cache['tables'][database] = entry
         elif database is not None and table_name is not None:
-            if database not in self.cache['columns']:
-                self.cache['columns'][database] = {}
-            self.cache['columns'][database][table_name] = {
-                "list": value,
-                "last_updated": time()
-            }
+            self._put_columns(database, table_name, entry)
+            if version is not None:
+                self.versions.setdefault(database, {})[table_name] = version
+        if self.store is not None and not negative:
+            self.store.save([(database or '', table_name or '', value, version)])
+
+    def update_schema(self, database: str, tables: list[str], columns: dict, versions: Optional[dict] = None):
+        """Record the full table list of *database* and the columns of the
+        tables in *columns*; cached tables missing from *tables* are dropped
+        and the remaining ones are marked as freshly validated."""
+        now = time()
+        present = set(tables)
+        known = self.cache['columns'].get(database, {})
+        dropped = [t for t in list(known) if t not in present]
+        dropped += [t for t in self.versions.get(database, {}) if t not in present and t not in known]
+        for table in dropped:
+            known.pop(table, None)
+            self._lru.pop((database, table), None)
+        for entry in known.values():
+            if not entry.get('negative'):
+                entry['last_updated'] = now
+        self.cache['tables'][database] = {"list": list(tables), "last_updated": now}
+        for table, cols in columns.items():
+            self._put_columns(database, table, {"list": cols, "last_updated": now})
+        versions = versions or {}
+        self.versions[database] = {t: versions[t] for t in tables if t in versions}
+        if self.store is not None:
+            self.store.delete(database, dropped)
+            self.store.save(
+                [(database, '', list(tables), None)]
+                + [(database, t, cols, versions.get(t)) for t, cols in columns.items()]
+            )
+
+
+# ── candidate index ───────────────────────────────────────────────────────────
+
+# Candidate classes the LM ranks as a whole rather than by name
+_CLASS_RANK_KEYS = {
+    'TABLE': '__TABLE__',
+    'CTE': '__TABLE__',
+    'COLUMN': '__COLUMN__',
+    'FUNCTION': '__FUNC__',
+}
+
+
+def _text_rank(query: str, key: str) -> int:
+    """Text component of predictions_weights() for upper-cased inputs."""
+    if query == key:
+        return 0
+    if key.startswith(query):
+        return 1
+    if query in key:
+        return 2
+    return 3
+
+
+class _CandidateRun:
+    """Suggestions of one class from one source, pre-sorted by label.
+
+    *source* is the object the run was built from (a cached column list, the
+    client, ...); the run is reused for as long as the source is the same
+    object, i.e. for the lifetime of a schema snapshot.
+    """
+    __slots__ = ('source', 'suffix', 'items', 'keys', '_names', '_positions')
+
+    def __init__(self, items: list, suffix: str, source=None):
+        self.items = sorted(items, key=lambda item: item[1])
+        self.keys = [item[1].upper() for item in self.items]
+        self.suffix = suffix
+        self.source = source
+        self._names = None
+        self._positions = None
+
+    def positions(self, name: str) -> list:
+        """Positions of the items whose label, minus the suffix, is *name*."""
+        if self._names is None:
+            cut = len(self.suffix) + 3  # ' (SUFFIX)'
+            self._names = {}
+            for pos, key in enumerate(self.keys):
+                self._names.setdefault(key[:-cut], []).append(pos)
+        return self._names.get(name, ())
+
+    def without(self, taken: set) -> list:
+        """Items whose id() is not in *taken*, copied slice by slice."""
+        if self._positions is None:
+            self._positions = {id(item): pos for pos, item in enumerate(self.items)}
+        cut = sorted(self._positions[i] for i in taken if i in self._positions)
+        if not cut:
+            return self.items
+        rest = []
+        start = 0
+        for pos in cut:
+            rest += self.items[start:pos]
+            start = pos + 1
+        rest += self.items[start:]
+        return rest
+
+
+class CandidateIndex:
+    """Suggestion candidates kept across requests, ranked without a full sort.
+
+    Candidates live in label-sorted runs, one per class and source.  The LM
+    either ranks a whole class at once or a handful of keywords by name, and
+    text ranks come from one substring scan, so every run splits into a few
+    label-sorted groups sharing a (lm_rank, text_rank) key.  Merging those
+    groups yields the same order as sorting by predictions_weights(), but
+    only the first *limit* candidates are ever compared.
+    """
+
+    MAX_RUNS = 256
+
+    def __init__(self):
+        self._runs: OrderedDict = OrderedDict()
+
+    def run(self, key: tuple, source, build, suffix: str) -> Optional[_CandidateRun]:
+        """Return the run cached under *key*, rebuilding it with
+        ``build(source)`` if it was built from a different source."""
+        if not source:
+            return None
+        run = self._runs.get(key)
+        if run is None or run.source is not source:
+            run = _CandidateRun(build(source), suffix, source)
+            self._runs[key] = run
+            while len(self._runs) > self.MAX_RUNS:
+                self._runs.popitem(last=False)
+        else:
+            self._runs.move_to_end(key)
+        return run
+
+    @staticmethod
+    def _groups(run: _CandidateRun, query: str, rank_map: dict, groups: dict):
+        class_key = _CLASS_RANK_KEYS.get(run.suffix)
+        lm_rank = rank_map.get(class_key, 999) if class_key else 999
+
+        # Keywords the LM ranks by name
+        named = {}
+        if lm_rank == 999:
+            for name, rank in rank_map.items():
+                for pos in run.positions(name):
+                    named[pos] = rank
+
+        if query:
+            default_text = 3
+            matched = [[], [], []]
+            for pos, key in enumerate(run.keys):
+                if query in key and pos not in named:
+                    matched[_text_rank(query, key)].append(pos)
+        else:
+            default_text = 1
+            matched = [[], [], []]
+
+        items = run.items
+        for pos, rank in named.items():
+            groups.setdefault((rank, _text_rank(query, run.keys[pos])), []).append([items[pos]])
+        for text_rank, positions in enumerate(matched):
+            if positions:
+                groups.setdefault((lm_rank, text_rank), []).append([items[pos] for pos in positions])
+
+        taken = len(named) + sum(map(len, matched))
+        if taken == 0:
+            rest = items
+        elif taken < len(items):
+            skip = set(named).union(*matched)
+            rest = (item for pos, item in enumerate(items) if pos not in skip)
+        else:
+            return
+        groups.setdefault((lm_rank, default_text), []).append(rest)
+
+    def rank(self, runs: list, word: str, rank_map: dict, limit: int) -> list:
+        """Return the best *limit* candidates of *runs*, as sorted() with
+        predictions_weights() would order them."""
+        query = word.upper()
+        groups = {}
+        seen = set()
+        for run in runs:
+            if run is not None and id(run) not in seen:
+                seen.add(id(run))
+                self._groups(run, query, rank_map, groups)
+
+        result = []
+        for key in sorted(groups):
+            seqs = groups[key]
+            merged = seqs[0] if len(seqs) == 1 else heapq.merge(*seqs, key=lambda item: item[1])
+            for item in merged:
+                result.append(item)
+                if len(result) >= limit:
+                    return result
+        return result
+
+    @staticmethod
+    def remainder(runs: list, top: list) -> list:
+        """Candidates of *runs* not in *top*, in run order."""
+        taken = {id(item) for item in top}
+        seen = set()
+        rest = []
+        for run in runs:
+            if run is not None and id(run) not in seen:
+                seen.add(id(run))
+                rest += run.without(taken)
+        return rest
 
 
 # ── autocomplete ──────────────────────────────────────────────────────────────
 
 class AutoComplete:
-    def __init__(self, client):
+    # Above this many changed tables one bulk query beats per-table lookups
+    BULK_REFRESH_THRESHOLD = 8
+    RANK_CACHE_SIZE = 512
+    TOP_N = 200  # suggestions ranked per request
+
+    def __init__(self, client, cache_path: str = None):
         self.client = client
-        self.cache = DbStructureCache()
+        self.cache = DbStructureCache(SchemaStore.for_client(client, cache_path))
+        self._inflight: dict = {}
+        # Connection of the metadata lookups, kept apart from user queries
+        self._meta_client = None
+        self._meta_lock: Optional[asyncio.Lock] = None
         self._lm_model = None
         self._lm_token_to_index = None
         self._lm_index_to_token = None
         self._lm_vocab_values = None
+        self._lm_tokenizer = None
+        self._lm_rank_cache: OrderedDict = OrderedDict()  # context indices -> rank map
         self._lm_load_attempted = False
+        self.index = CandidateIndex()
 
     def _load_model(self) -> bool:
         """Load LM weights once. Returns True if model is ready."""
@@ -367,30 +1049,39 @@ class AutoComplete:
         self._lm_load_attempted = True
 
         try:
-            model, t2i, i2t = _load_weights(_WEIGHTS_PATH)
+            model, t2i, i2t = _load_weights()
             self._lm_model = model
             self._lm_token_to_index = t2i
             self._lm_index_to_token = i2t
             self._lm_vocab_values = set(t2i.keys())
+            self._lm_tokenizer = _TailTokenizer(self._lm_vocab_values)
             return True
         except Exception:
             return False
 
     def _get_lm_rank_map(self, sql_context: str) -> dict:
-        """Return a dict mapping candidate keys to integer LM ranks (lower = better)."""
+        """Return a dict mapping candidate keys to integer LM ranks (lower = better).
+
+        The model only sees the last _CONTEXT_LENGTH tokens, so rank maps are
+        memoised by that context: repeated completions within a clause skip
+        inference entirely.
+        """
         if not sql_context or not sql_context.strip():
             return {}
         if not self._load_model():
             return {}
 
-        predictions = _predict_next(
-            sql_context,
-            self._lm_model,
-            self._lm_token_to_index,
-            self._lm_index_to_token,
-            self._lm_vocab_values,
-            top_k=20,
-        )
+        tokens = self._lm_tokenizer.tail(sql_context)
+        context = tuple(_context_indices(tokens, self._lm_token_to_index))
+        rank_map = self._lm_rank_cache.get(context)
+        if rank_map is not None:
+            self._lm_rank_cache.move_to_end(context)
+            return rank_map
+
+        predictions = [
+            (self._lm_index_to_token[idx], prob)
+            for idx, prob in self._lm_model.predict(list(context), 20)
+        ]
 
         rank_map = {}
         for rank, (token_name, _prob) in enumerate(predictions):
@@ -403,6 +1094,9 @@ class AutoComplete:
             elif token_name not in ('<VALUE>', '<OPERATOR>', ''):
                 rank_map[token_name.upper()] = rank
 
+        self._lm_rank_cache[context] = rank_map
+        while len(self._lm_rank_cache) > self.RANK_CACHE_SIZE:
+            self._lm_rank_cache.popitem(last=False)
         return rank_map
 
     @staticmethod
@@ -419,60 +1113,200 @@ class AutoComplete:
             bare = candidate[:paren].upper()
             suffix = candidate[paren + 2:-1].upper()
 
-        if suffix == 'TABLE' and '__TABLE__' in rank_map:
-            return rank_map['__TABLE__']
-        if suffix == 'COLUMN' and '__COLUMN__' in rank_map:
-            return rank_map['__COLUMN__']
-        if suffix == 'FUNCTION' and '__FUNC__' in rank_map:
-            return rank_map['__FUNC__']
+        class_key = _CLASS_RANK_KEYS.get(suffix)
+        if class_key in rank_map:
+            return rank_map[class_key]
 
         return rank_map.get(bare, 999)
 
-    async def get_cached_databases(self) -> list[str]:
-        databases = self.cache.get()
-
-        if databases is None:
-            databases = [list(x.values())[0] for x in (await self.client.get_databases()).data]
-            self.cache.set(databases)
+    # ── cached metadata lookups ──────────────────────────────────────────────
+    # Stale entries are returned immediately and refreshed in the background;
+    # concurrent lookups of the same key share one in-flight query.
+
+    async def _single_flight(self, key: tuple, load):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        # shield: a cancelled caller must not cancel the lookup others wait on
+        return await asyncio.shield(task)
+
+    def _refresh(self, key: tuple, load):
+        if key in self._inflight:
+            return
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+
+        def done(t):
+            self._inflight.pop(key, None)
+            if not t.cancelled():
+                t.exception()  # refresh errors keep the stale value
+
+        task.add_done_callback(done)
+
+    async def _cached(self, key: tuple, load, database: str = None, table: str = None):
+        value, state = self.cache.lookup(database, table)
+        if state == DbStructureCache.STALE:
+            self._refresh(key, load)
+        if state != DbStructureCache.MISS:
+            return value
+        return await self._single_flight(key, load)
+
+    async def _on_meta_client(self, query):
+        """Await ``query(client)`` on the metadata connection.
+
+        Lookups run in the background (revalidation, speculative suggestions)
+        while the user's query or a VisiData sheet holds ``self.client``, so
+        they get a clone of their own, used by one lookup at a time.
+        """
+        if self._meta_lock is None:
+            self._meta_lock = asyncio.Lock()
+        async with self._meta_lock:
+            if self._meta_client is not None and self._meta_client.dbname != self.client.dbname:
+                # Follow the user's database (Postgres lookups cannot cross it)
+                await self._drop_meta_client()
+            if self._meta_client is None:
+                self._meta_client = self.client.clone()
+            client = self._meta_client
+            try:
+                return await query(client)
+            except Exception as exc:
+                if not client.is_db_error_exception(exc):
+                    # Connection state unknown; reconnect on the next lookup
+                    await self._drop_meta_client()
+                raise
+
+    async def _drop_meta_client(self):
+        client, self._meta_client = self._meta_client, None
+        try:
+            await client.close()
+        except Exception:
+            pass
 
+    async def _load_databases(self) -> list[str]:
+        result = await self._on_meta_client(lambda client: client.get_databases())
+        databases = [list(x.values())[0] for x in result.data]
+        self.cache.set(databases)
         return databases
 
+    async def _load_tables(self, database: str) -> Optional[list[str]]:
+        databases = await self.get_cached_databases()
+        if database not in databases:
+            self.cache.set(None, database=database, negative=True)
+            return None
+        result = await self._on_meta_client(lambda client: client.get_tables(database))
+        tables = [list(x.values())[0] for x in result.data]
+        self.cache.set(tables, database=database)
+        return tables
+
+    async def _load_columns(self, table_name: str, database: str) -> list[str]:
+        try:
+            columns = await self._on_meta_client(lambda client: client.get_table_columns(table_name, database))
+        except Exception:
+            columns = []
+        self.cache.set(columns, database=database, table_name=table_name, negative=not columns)
+        return columns
+
+    async def get_cached_databases(self) -> list[str]:
+        return await self._cached(('databases',), self._load_databases)
+
     async def get_cached_tables(self, database: str = None) -> list[str]:
         if database is None:
             database = self.client.dbname
 
-        tables = self.cache.get(database)
-
-        if tables is None:
-            databases = await self.get_cached_databases()
-            if database not in databases:
-                return None
-            tables = [list(x.values())[0] for x in (await self.client.get_tables(database)).data]
-            self.cache.set(tables, database=database)
-
-        return tables
+        return await self._cached(
+            ('tables', database), lambda: self._load_tables(database), database
+        )
 
     async def get_cached_columns(self, table_name: str, database: str = None) -> list[str]:
         if database is None:
             database = self.client.dbname
 
-        columns = self.cache.get(database, table_name)
+        # Aliases and CTE names never reach the server
+        known = self.cache.has_table(database, table_name)
+        if known is False:
+            return []
+        if known is None and self.cache.lookup(database)[1] == DbStructureCache.STALE:
+            self._refresh(('tables', database), lambda: self._load_tables(database))
+
+        return await self._cached(
+            ('columns', database, table_name),
+            lambda: self._load_columns(table_name, database),
+            database, table_name,
+        )
 
-        if columns is None:
-            columns = await self.client.get_table_columns(table_name, database)
-            self.cache.set(columns, database=database, table_name=table_name)
+    async def prefetch_schema(self, database: str = None) -> bool:
+        """Bring the cached tables and columns of *database* up to date.
 
-        return columns
+        Runs on its own connection so it can proceed in the background
+        alongside user queries.  When the engine exposes per-table versions
+        only tables whose version changed are re-read; otherwise the whole
+        database is loaded with a single metadata query.
+        """
+        if database is None:
+            database = self.client.dbname
+
+        client = self.client.clone()
+        try:
+            return await self._revalidate(client, database)
+        except Exception:
+            return False
+        finally:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    async def _revalidate(self, client, database: str) -> bool:
+        versions = await client.get_schema_versions(database)
+        known = self.cache.versions.get(database)
+
+        if versions is not None and known:
+            changed = [t for t, v in versions.items() if known.get(t) != v]
+            if len(changed) <= self.BULK_REFRESH_THRESHOLD:
+                columns = {}
+                for table in changed:
+                    columns[table] = await client.get_table_columns(table, database)
+                self.cache.update_schema(database, list(versions), columns, versions)
+                return True
+
+        schema = await client.get_schema_columns(database)
+        if schema is None:
+            return False
+        self.cache.update_schema(database, list(schema), schema, versions)
+        return True
 
     async def get_all_functions(self) -> list[str]:
         return self.client.all_functions
 
-    async def _fetch_columns_for_tables(
-        self,
-        table_specs: list[str],
-        *,
-        dedupe_against: Optional[set] = None,
-    ) -> list[tuple[str, str]]:
+    def _column_run(self, columns: list, database: Optional[str], table: str, prefix: str) -> Optional[_CandidateRun]:
+        return self.index.run(
+            ('columns', database, table, prefix), columns,
+            lambda cols: [(col, f"{prefix}.{col} (COLUMN)", '') for col in cols], 'COLUMN',
+        )
+
+    async def _static_runs(self) -> list:
+        functions_list = await self.get_all_functions()
+        return [
+            self.index.run(
+                ('commands',), self.client,
+                lambda client: [(x, f"{x} (COMMAND)", '') for x in client.all_commands], 'COMMAND',
+            ),
+            self.index.run(
+                ('functions',), self.client,
+                lambda _client: [(x, f"{x} (FUNCTION)", '') for x in functions_list or ()], 'FUNCTION',
+            ),
+            self.index.run(
+                ('pipeline',), PIPELINE_COMMANDS,
+                lambda commands: [
+                    (f'.{cmd.upper()}', f'.{cmd.upper()} (PIPELINE)', PIPELINE_COMMAND_HINTS.get(cmd, ''))
+                    for cmd in commands
+                ], 'PIPELINE',
+            ),
+        ]
+
+    async def _fetch_columns_for_tables(self, table_specs: list[str]) -> list[_CandidateRun]:
         results = []
         for spec in table_specs:
             db = None
@@ -485,64 +1319,77 @@ class AutoComplete:
                     else await self.get_cached_columns(table, db)
             except Exception:
                 pass
-            if cols:
-                for col in cols:
-                    candidate = (col, f"{table}.{col} (COLUMN)")
-                    if dedupe_against is None:
-                        results.append(candidate)
-                    elif candidate not in dedupe_against:
-                        results.append(candidate)
-                        dedupe_against.add(candidate)
+            results.append(self._column_run(cols, db, table, table))
         return results
 
+    async def _get_alias_suggestions(self, analysis: SqlAnalysis, alias: str) -> list[_CandidateRun]:
+        """Columns of the table that *alias* stands for in the statement."""
+        table_spec = analysis.aliases.get(alias.lower())
+        if table_spec is None:
+            return []
+        db, _, table = table_spec.rpartition('.')
+        try:
+            cols = await self.get_cached_columns(table, db or None)
+        except Exception:
+            return []
+        return [self._column_run(cols, db or None, table, alias)]
+
     async def _get_schema_suggestions(
         self,
         parts: list[str],
         part1: Union[str, None],
         part2: Union[str, None],
-    ) -> List[Tuple[str, str]]:
+    ) -> list[_CandidateRun]:
         results = []
         curr_tables_list = None
 
         if part1 is None:
             try:
-                databases_list = sorted(await self.get_cached_databases())
-                if databases_list:
-                    results += [(x, f"{x} (DATABASE)") for x in databases_list]
+                results.append(self.index.run(
+                    ('databases',), await self.get_cached_databases(),
+                    lambda dbs: [(x, f"{x} (DATABASE)", '') for x in dbs], 'DATABASE',
+                ))
             except Exception:
                 pass
 
         if part2 is None:
             try:
-                curr_tables_list = sorted(await self.get_cached_tables())
-                if len(parts) < 2 and curr_tables_list:
-                    results += [(x, f"{x} (TABLE)") for x in curr_tables_list]
+                curr_tables_list = await self.get_cached_tables()
+                if len(parts) < 2:
+                    results.append(self.index.run(
+                        ('tables', self.client.dbname), curr_tables_list,
+                        lambda tables: [(x, f"{x} (TABLE)", '') for x in tables], 'TABLE',
+                    ))
             except Exception:
                 pass
 
         if part1 is not None and part2 is None:
             try:
-                tables_list = sorted(await self.get_cached_tables(part1))
-                if tables_list:
-                    results += [(x, f"{x} (TABLE)") for x in tables_list]
+                results.append(self.index.run(
+                    ('tables', part1), await self.get_cached_tables(part1),
+                    lambda tables: [(x, f"{x} (TABLE)", '') for x in tables], 'TABLE',
+                ))
                 if curr_tables_list and part1 in curr_tables_list:
-                    columns_list = sorted(await self.get_cached_columns(part1))
-                    if columns_list:
-                        results += [(x, f"{part1}.{x} (COLUMN)") for x in columns_list]
+                    results.append(self._column_run(await self.get_cached_columns(part1), None, part1, part1))
             except Exception:
                 pass
 
         if part1 is not None and part2 is not None:
             try:
-                columns_list = sorted(await self.get_cached_columns(part2, part1))
-                if columns_list:
-                    results += [(x, f"{part1}.{x} (COLUMN)") for x in columns_list]
+                results.append(self._column_run(await self.get_cached_columns(part2, part1), part1, part2, part1))
             except Exception:
                 pass
 
         return results
 
-    async def get_suggestions(self, parts: list[str], sql_context: str = "", full_sql: str = "") -> list[str]:
+    async def get_suggestions(
+        self, parts: list[str], sql_context: str = "", full_sql: str = "", limit: int = None,
+    ) -> list[tuple]:
+        """Return (insert, label, hint) suggestions, best first.
+
+        Only the first *limit* (default TOP_N) are ranked; the rest follow in
+        label order so that the popup filter can still reach them.
+        """
         word = parts[-1] if parts else ''
 
         part1 = None
@@ -553,32 +1400,16 @@ class AutoComplete:
             part1 = parts[0]
             part2 = parts[1]
 
-        suggestions = [(x, f"{x} (COMMAND)", '') for x in self.client.all_commands]
-        functions_list = await self.get_all_functions()
-        if functions_list:
-            suggestions += [(x, f"{x} (FUNCTION)", '') for x in functions_list]
-        suggestions += [
-            (f'.{cmd.upper()}', f'.{cmd.upper()} (PIPELINE)', PIPELINE_COMMAND_HINTS.get(cmd, ''))
-            for cmd in PIPELINE_COMMANDS
-        ]
-
-        query_tables = _get_tables_from_sql(full_sql)
-        suggestions += [(ins, lbl, '') for ins, lbl in await self._fetch_columns_for_tables(query_tables)]
-        suggestions += [(ins, lbl, '') for ins, lbl in await self._get_schema_suggestions(parts, part1, part2)]
+        runs = await self._static_runs()
+        analysis = analyze_sql(full_sql or '')
+        runs += await self._fetch_columns_for_tables(analysis.tables)
+        if analysis.ctes:
+            runs.append(_CandidateRun([(x, f"{x} (CTE)", '') for x in analysis.ctes], 'CTE'))
+        if part1 is not None and part2 is None:
+            runs += await self._get_alias_suggestions(analysis, part1)
+        runs += await self._get_schema_suggestions(parts, part1, part2)
 
         rank_map = self._get_lm_rank_map(sql_context)
 
-        if rank_map.get('__COLUMN__', 999) == 0 and full_sql:
-            suggestions += [
-                (ins, lbl, '') for ins, lbl in
-                await self._fetch_columns_for_tables(
-                    query_tables,
-                    dedupe_against={(ins, lbl) for ins, lbl, _ in suggestions},
-                )
-            ]
-
-        def sort_key(candidate: tuple) -> tuple:
-            lm_rank = self._candidate_lm_rank(candidate[1], rank_map)
-            return predictions_weights(word, candidate[1], lm_rank)
-
-        return sorted(suggestions, key=sort_key)
+        top = self.index.rank(runs, word, rank_map, self.TOP_N if limit is None else limit)
+        return top + self.index.remainder(runs, top)
@@ -1,5 +1,9 @@
 import abc
+import copy
 import re
+import sys
+from array import array
+from collections.abc import MutableMapping
 from time import time
 from typing import Optional
 from dataclasses import dataclass, field
@@ -7,6 +11,13 @@ from dataclasses import dataclass, field
 
 COMMAND_RE = re.compile(r'\.([a-zA-Z_0-9]+)\s*(.*)', re.IGNORECASE)
 
+# Rows (or column values) looked at by Result.memory_size()
+SIZE_SAMPLE = 64
+
+
+def _sample(seq) -> list:
+    return seq[::max(1, len(seq) // SIZE_SAMPLE)][:SIZE_SAMPLE]
+
 
 @dataclass
 class CommandParams:
@@ -34,10 +45,216 @@ class Result:
 
         return 'Empty set'
 
+    def view_rows(self) -> list:
+        """Rows to hand to VisiData"""
+        return self.data
+
+    def copy(self) -> 'Result':
+        """Copy whose rows can be edited without changing this result's rows"""
+        rows = [
+            ResultRow(row._positions, row._values) if isinstance(row, ResultRow) else copy.copy(row)
+            for row in self.data
+        ]
+        return Result(rows, self.rowcount, self.has_more, self.message)
+
+    def memory_size(self) -> int:
+        """Rough bytes held by the rows and their values, from a sample of rows"""
+        rows = self.data
+        if not rows:
+            return 0
+        sample = _sample(rows)
+        per_row = sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+            for row in sample
+        ) / len(sample)
+        return int(per_row * len(rows))
+
+    @classmethod
+    def from_tuples(cls, names, rows, rowcount: Optional[int] = None, **kwargs) -> 'Result':
+        """Result whose rows are ResultRow views sharing one name -> position map"""
+        positions = {name: pos for pos, name in enumerate(names)}
+        data = [ResultRow(positions, values) for values in rows]
+        return cls(data, len(data) if rowcount is None else rowcount, **kwargs)
+
+
+class ResultRow(MutableMapping):
+    """One row of a Result: a values tuple plus the name -> position map
+    shared by every row of that result.
+
+    Behaves like the dict it replaces while storing a row in a fraction of
+    the memory.  Writing a column the result does not have gives this row its
+    own copy of the map.
+    """
+    __slots__ = ('_positions', '_values')
+
+    def __init__(self, positions: dict, values: tuple):
+        self._positions = positions
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._positions[key]]
+
+    def __setitem__(self, key, value):
+        values = list(self._values)
+        pos = self._positions.get(key)
+        if pos is None:
+            self._positions = {**self._positions, key: len(values)}
+            values.append(value)
+        else:
+            values[pos] = value
+        self._values = tuple(values)
+
+    def __delitem__(self, key):
+        if key not in self._positions:
+            raise KeyError(key)
+        names = [name for name in self._positions if name != key]
+        self._values = tuple(self[name] for name in names)
+        self._positions = {name: pos for pos, name in enumerate(names)}
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self._values)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+
+class ColumnarResult(Result):
+    """Result kept in the column layout the driver decoded it into.
+
+    ``data`` builds the usual ResultRow list on first access, for code that
+    wants row mappings.  ``view_rows()`` gives VisiData ColumnarRow views
+    instead, which read values straight from the columns.
+    """
+
+    def __init__(self, names, columns, rowcount: Optional[int] = None, message: str = ''):
+        self.names = list(names)
+        self.columns = list(columns)
+        self.positions = {name: pos for pos, name in enumerate(self.names)}
+        self.rowcount = len(self.columns[0]) if self.columns else rowcount
+        self.has_more = False
+        self.message = message
+        self._data = None
+        # Positions of columns shared with another result, copied before an edit
+        self._borrowed = set()
+
+    @property
+    def data(self) -> list[dict]:
+        if self._data is None:
+            positions = dict(self.positions)
+            self._data = [ResultRow(positions, values) for values in zip(*self.columns)]
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    def __str__(self) -> str:
+        if self._data is None and self.columns and self.rowcount and not self.message:
+            return f'{self.rowcount} rows returned'
+        return super().__str__()
+
+    def view_rows(self) -> list:
+        if self._data is not None:
+            return self._data
+        if not self.columns:
+            return []
+        return [ColumnarRow(self, index) for index in range(self.rowcount or 0)]
+
+    def copy(self) -> Result:
+        if self._data is not None:
+            return super().copy()
+        other = ColumnarResult(self.names, self.columns, self.rowcount, self.message)
+        other._borrowed = set(range(len(self.columns)))
+        return other
+
+    def memory_size(self) -> int:
+        if self._data is not None:
+            return super().memory_size()
+        size = 0
+        for column in self.columns:
+            size += sys.getsizeof(column)
+            if not isinstance(column, array) and len(column):
+                sample = _sample(column)
+                size += int(sum(sys.getsizeof(value) for value in sample) / len(sample) * len(column))
+        return size
+
+    def set_value(self, index: int, name: str, value) -> None:
+        pos = self.positions.get(name)
+        if pos is None:
+            pos = self.positions[name] = len(self.names)
+            self.names.append(name)
+            self.columns.append([None] * (self.rowcount or 0))
+        column = self.columns[pos]
+        if isinstance(column, array) or pos in self._borrowed:
+            # Typed arrays only hold their own type and edits may put anything
+            # here; borrowed columns belong to another result as well
+            column = self.columns[pos] = list(column)
+            self._borrowed.discard(pos)
+        column[index] = value
+
+
+class ColumnarRow(MutableMapping):
+    """One row of a ColumnarResult; values are read from its columns on access"""
+    __slots__ = ('_result', '_index')
+
+    def __init__(self, result: ColumnarResult, index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key):
+        result = self._result
+        return result.columns[result.positions[key]][self._index]
+
+    def __setitem__(self, key, value):
+        self._result.set_value(self._index, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError('cannot remove a column from a single result row')
+
+    def __contains__(self, key):
+        return key in self._result.positions
+
+    def __iter__(self):
+        return iter(self._result.names)
+
+    def __len__(self):
+        return len(self._result.names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
 
 class ClientClass(abc.ABC):
     ENGINE = ''
     SUPPORTS_SERVER_SIDE_PAGING = False
+    IDENT_QUOTE = '"'
 
     COMMANDS = [
         'tables', 'databases', 'schema', 'use'
@@ -86,6 +303,30 @@ class ClientClass(abc.ABC):
     async def get_table_columns(self, table_name: str, database: str = None):
         pass
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        """Return {table: [column, ...]} for a whole database in one round trip,
+        or None if the engine has no bulk metadata query."""
+        return None
+
+    async def get_schema_versions(self, database: Optional[str] = None) -> Optional[dict[str, str]]:
+        """Return {table: version} where version changes whenever the table's
+        definition does, or None if the engine has no cheap change signal."""
+        return None
+
+    def get_cache_key(self) -> Optional[str]:
+        """Identifies the server for the on-disk schema cache (None disables it)."""
+        return f'{self.ENGINE}:{self.username}@{self.unix_socket or self.host}:{self.port}'
+
+    def clone(self) -> 'ClientClass':
+        """Copy of this client with its own connection, so background metadata
+        queries never share a connection with a running user query."""
+        other = copy.copy(self)
+        other.connection = None
+        return other
+
+    async def close(self) -> None:
+        pass
+
     @abc.abstractmethod
     async def get_databases(self) -> Result:
         pass
@@ -148,6 +389,17 @@ class ClientClass(abc.ABC):
     def get_title(self) -> str:
         return f'{self.ENGINE} {self.host}:{self.port} {self.dbname}'
 
+    def quote_name(self, name: str) -> str:
+        """Quote a possibly dotted (database.table) identifier"""
+        q = self.IDENT_QUOTE
+        return '.'.join(q + part.replace(q, q + q) + q for part in name.split('.'))
+
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        """Insert *rows* (tuples ordered like *columns*) into *table* using the
+        engine's fastest path.  Raises on error; engines that can do so leave
+        none of the rows inserted."""
+        raise NotImplementedError(f'Bulk load is not supported for {self.ENGINE}')
+
     @abc.abstractmethod
     async def execute(self, sql) -> Result:
         pass
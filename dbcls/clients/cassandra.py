@@ -5,8 +5,9 @@ import logging
  
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.cluster import Cluster
+from cassandra.concurrent import execute_concurrent_with_args
 from cassandra.query import SimpleStatement
-from cassandra.query import dict_factory
+from cassandra.query import tuple_factory
 from cassandra.io.asyncioreactor import AsyncioConnection
 from cassandra import UnresolvableContactPoints
 
@@ -22,6 +23,7 @@ logging.getLogger('cassandra.connection').disabled = True
 
 
 DEFAULT_PAGER_LIMIT = 5000
+BULK_INSERT_CONCURRENCY = 50
 
 
 class CassandraClient(ClientClass):
@@ -81,7 +83,7 @@ class CassandraClient(ClientClass):
             None,
             self._cluster.connect
         )
-        self.connection.row_factory = dict_factory
+        self.connection.row_factory = tuple_factory
 
         if self.dbname:
             await self.change_database(self.dbname)
@@ -104,6 +106,37 @@ class CassandraClient(ClientClass):
 
         return [f"{row['column_name']}" for row in result.data]
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        db_name = database or self.dbname
+        sql = f"""
+            SELECT table_name, column_name
+            FROM system_schema.columns
+            WHERE keyspace_name = '{db_name}'
+        """
+
+        schema = {}
+        try:
+            result = await self.execute(sql)
+            while True:
+                for row in result.data:
+                    schema.setdefault(row['table_name'], []).append(row['column_name'])
+                if not result.has_more:
+                    break
+                result = await self.execute(sql)
+        finally:
+            self.reset_pager()
+        return schema
+
+    def clone(self) -> 'CassandraClient':
+        other = super().clone()
+        other.reset_pager()
+        return other
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            self._cluster.shutdown()
+            self.connection = None
+
     async def get_tables(self, database: Optional[str] = None) -> Result:
         if not database:
             database = self.dbname
@@ -165,6 +198,21 @@ class CassandraClient(ClientClass):
             return False
         return True
 
+    def _bulk_insert_sync(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        statement = self.connection.prepare('INSERT INTO %s (%s) VALUES (%s)' % (
+            self.quote_name(table),
+            ', '.join(self.quote_name(col) for col in columns),
+            ', '.join('?' * len(columns)),
+        ))
+        # Not atomic, but INSERT is an upsert in CQL, so retrying rows is safe
+        execute_concurrent_with_args(self.connection, statement, rows, concurrency=BULK_INSERT_CONCURRENCY)
+        return Result(rowcount=len(rows))
+
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        if self.connection is None:
+            await self.connect()
+        return await asyncio.to_thread(self._bulk_insert_sync, table, columns, rows)
+
     async def execute(self, sql) -> Result:
         result = await self.if_command_process(sql)
 
@@ -195,7 +243,8 @@ class CassandraClient(ClientClass):
                     self._paging_state = None
                     self._pager_limit = DEFAULT_PAGER_LIMIT
 
-                return Result(
+                return Result.from_tuples(
+                    data.column_names or [],
                     data.current_rows,
                     len(data.current_rows),
                     has_more=data.has_more_pages
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from array import array
 from typing import Optional
 
 import clickhouse_connect
@@ -6,6 +8,7 @@ import clickhouse_connect
 from .base import (
     CommandParams,
     ClientClass,
+    ColumnarResult,
     Result
 )
 
@@ -13,8 +16,27 @@ from .base import (
 logging.getLogger('urllib3.connectionpool').setLevel(logging.ERROR)
 
 
+def _read_columns(raw_data) -> list:
+    """Concatenate the native column blocks of a query result.  Numeric
+    columns stay the array.array the driver decoded them into, instead of
+    one boxed Python number per row."""
+    columns = None
+    with raw_data.column_block_stream as stream:
+        for block in stream:
+            if columns is None:
+                columns = [column if isinstance(column, array) else list(column) for column in block]
+                continue
+            for pos, added in enumerate(block):
+                column = columns[pos]
+                if isinstance(column, array) and not (isinstance(added, array) and added.typecode == column.typecode):
+                    column = columns[pos] = column.tolist()
+                column.extend(added)
+    return columns or []
+
+
 class ClickhouseClient(ClientClass):
     ENGINE = 'Clickhouse'
+    IDENT_QUOTE = '`'
 
     SQL_COMMANDS = ['TABLES', 'DATABASES', 'USE', 'SHOW', 'CLUSTERS']
 
@@ -28,6 +50,8 @@ class ClickhouseClient(ClientClass):
     def __init__(self, host, username, password, dbname, port='8123', compress=True):
         super().__init__(host, username, password, dbname, port)
         self.compress = compress
+        # Database the open client (self.connection) was created for
+        self._client_dbname = None
 
         if not dbname:
             self.dbname = 'default'
@@ -39,6 +63,29 @@ class ClickhouseClient(ClientClass):
         result = await self._execute(f"DESCRIBE {db_name}.{table_name}")
         return [f"{row['name']}" for row in result.data]
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        db_name = database or self.dbname
+        result = await self._execute(f"""
+            SELECT table, name
+            FROM system.columns
+            WHERE database = '{db_name}'
+            ORDER BY table, position
+        """)
+
+        schema = {}
+        for row in result.data:
+            schema.setdefault(row['table'], []).append(row['name'])
+        return schema
+
+    async def get_schema_versions(self, database: Optional[str] = None) -> Optional[dict[str, str]]:
+        db_name = database or self.dbname
+        result = await self._execute(f"""
+            SELECT name, toString(metadata_modification_time) AS ver
+            FROM system.tables
+            WHERE database = '{db_name}'
+        """)
+        return {row['name']: row['ver'] for row in result.data}
+
     async def get_tables(self, database: Optional[str] = None) -> Result:
         if not database:
             database = self.dbname
@@ -76,27 +123,48 @@ class ClickhouseClient(ClientClass):
     async def command_schema(self, command: CommandParams):
         return await self.get_schema(command.params)
 
-    async def _execute(self, sql):
-        db = self.dbname
+    async def _get_client(self):
+        # One client reused across queries (the async client has no session,
+        # so nothing leaks from one query to the next); a new one after USE
+        if self.connection is not None and self._client_dbname != self.dbname:
+            await self.close()
+        if self.connection is None:
+            self.connection = await clickhouse_connect.get_async_client(
+                host=self.host,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                database=self.dbname,
+                compress=self.compress
+            )
+            self._client_dbname = self.dbname
+        return self.connection
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            await connection.close()
 
-        client = await clickhouse_connect.get_async_client(
-            host=self.host,
-            port=self.port,
-            username=self.username,
-            password=self.password,
-            database=db,
-            compress=self.compress
-        )
+    async def _execute(self, sql):
+        client = await self._get_client()
 
         raw_data = await client.query(query=sql)
+        # Later blocks are still being read from the response
+        columns = await asyncio.to_thread(_read_columns, raw_data)
 
-        data = [dict(x) for x in raw_data.named_results()]
-
-        return Result(data=data, rowcount=raw_data.summary.get('result_rows', None))
+        # Summary header values arrive as strings
+        rowcount = int(raw_data.summary.get('result_rows') or 0)
+        return ColumnarResult(raw_data.column_names, columns, rowcount=rowcount)
 
     def is_db_error_exception(self, exc: Exception) -> bool:
         return isinstance(exc, clickhouse_connect.driver.exceptions.ClickHouseError)
 
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        # Native columnar insert; a dotted table name overrides the database
+        client = await self._get_client()
+        await client.insert(table, rows, column_names=columns, database=self.dbname)
+        return Result(rowcount=len(rows))
+
     async def execute(self, sql) -> Result:
         result = await self.if_command_process(sql)
 
@@ -10,8 +10,21 @@ from .base import (
 )
 
 
+class TupleRowCursor(aiomysql.DictCursor):
+    """DictCursor's column naming (repeated names get a table prefix), but
+    rows are left as the tuples the protocol decoded"""
+
+    def _conv_row(self, row):
+        return row
+
+    @property
+    def column_names(self) -> list[str]:
+        return getattr(self, '_fields', None) or []
+
+
 class MysqlClient(ClientClass):
     ENGINE = 'MySQL'
+    IDENT_QUOTE = '`'
 
     SQL_COMMANDS = [
         'TABLES', 'DATABASES', 'USE', 'SHOW', 'PROCESSLIST', 'DEFAULT', 'KEY', 'PRIMARY', 'CHARACTER',
@@ -65,6 +78,34 @@ class MysqlClient(ClientClass):
 
         return [f"{row['COLUMN_NAME']}" for row in result.data]
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        db_name = database or self.dbname
+        result = await self.execute(f"""
+            SELECT table_name AS tbl, column_name AS col
+            FROM information_schema.columns
+            WHERE table_schema = '{db_name}'
+            ORDER BY table_name, ordinal_position
+        """)
+
+        schema = {}
+        for row in result.data:
+            schema.setdefault(row['tbl'], []).append(row['col'])
+        return schema
+
+    async def get_schema_versions(self, database: Optional[str] = None) -> Optional[dict[str, str]]:
+        db_name = database or self.dbname
+        result = await self.execute(f"""
+            SELECT table_name AS tbl, CONCAT_WS('|', create_time, update_time) AS ver
+            FROM information_schema.tables
+            WHERE table_schema = '{db_name}'
+        """)
+        return {row['tbl']: str(row['ver']) for row in result.data}
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
     async def get_tables(self, database: Optional[str] = None) -> Result:
         if not database:
             database = self.dbname
@@ -107,6 +148,29 @@ class MysqlClient(ClientClass):
     def is_db_error_exception(self, exc: Exception) -> bool:
         return isinstance(exc, MySQLError)
 
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            self.quote_name(table),
+            ', '.join(self.quote_name(col) for col in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+
+        if self.connection is None:
+            await self.connect()
+
+        # executemany() rewrites this into multi-row INSERTs, splitting them
+        # at max_stmt_length, so the transaction keeps the batch atomic
+        await self.connection.begin()
+        try:
+            async with self.connection.cursor() as cur:
+                await cur.executemany(sql, rows)
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
+
+        return Result(rowcount=len(rows))
+
     async def execute(self, sql) -> Result:
         result = await self.if_command_process(sql)
 
@@ -119,11 +183,11 @@ class MysqlClient(ClientClass):
                 if self.connection is None:
                     await self.connect()
 
-                async with self.connection.cursor(aiomysql.DictCursor) as cur:
+                async with self.connection.cursor(TupleRowCursor) as cur:
                     await cur.execute(sql)
-                    data = await cur.fetchall()
+                    rows = await cur.fetchall()
 
-                    return Result(data, cur.rowcount)
+                    return Result.from_tuples(cur.column_names, rows, cur.rowcount)
             except InterfaceError as exc:
                 self.connection = None
 
@@ -5,7 +5,7 @@ from typing import Optional
 
 import aiopg
 from psycopg2 import InterfaceError, DatabaseError
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import encodings
 
 from .base import (
     CommandParams,
@@ -65,6 +65,38 @@ class PostgresClient(ClientClass):
         """)
         return [f"{row['column_name']}" for row in result.data]
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        if database and database != self.dbname:
+            return None
+        result = await self.execute("""
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+            ORDER BY table_name, ordinal_position
+        """)
+
+        schema = {}
+        for row in result.data:
+            schema.setdefault(row['table_name'], []).append(row['column_name'])
+        return schema
+
+    async def get_schema_versions(self, database: Optional[str] = None) -> Optional[dict[str, str]]:
+        if database and database != self.dbname:
+            return None
+        # pg_class.xmin changes whenever the relation's catalog row is rewritten (ALTER TABLE)
+        result = await self.execute("""
+            SELECT c.relname AS tbl, c.xmin::text AS ver
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+        """)
+        return {row['tbl']: row['ver'] for row in result.data}
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
     async def get_tables(self, database: Optional[str] = None) -> Result:
         if database and database != self.dbname:
             raise Exception("Cross-database queries are not supported")
@@ -240,6 +272,24 @@ class PostgresClient(ClientClass):
     def is_db_error_exception(self, exc: Exception) -> bool:
         return isinstance(exc, DatabaseError)
 
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        # COPY is unavailable on aiopg's asynchronous connections, so the batch
+        # goes as one multi-row INSERT, which is also atomic
+        if self.connection is None:
+            await self.connect()
+
+        head = 'INSERT INTO %s (%s) VALUES ' % (
+            self.quote_name(table),
+            ', '.join(self.quote_name(col) for col in columns),
+        )
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+
+        async with self.connection.cursor() as cur:
+            values = b','.join(cur.mogrify(placeholders, row) for row in rows)
+            await cur.execute(head.encode(encodings[self.connection.raw.encoding]) + values)
+
+        return Result(rowcount=len(rows))
+
     async def execute(self, sql) -> Result:
         result = await self.if_command_process(sql)
 
@@ -251,14 +301,13 @@ class PostgresClient(ClientClass):
                 if self.connection is None:
                     await self.connect()
 
-                async with self.connection.cursor(cursor_factory=RealDictCursor) as cur:
+                async with self.connection.cursor() as cur:
                     await cur.execute(sql)
                     rowcount = cur.rowcount
-                    result = Result(rowcount=rowcount)
-
-                    result.data = await cur.fetchall()
+                    rows = await cur.fetchall()
+                    names = [col.name for col in cur.description or ()]
 
-                    return result
+                    return Result.from_tuples(names, rows, rowcount)
             except InterfaceError as exc:
                 self.connection = None
 
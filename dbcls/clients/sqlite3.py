@@ -1,3 +1,4 @@
+import os
 import sqlite3
 import asyncio
 from typing import Optional
@@ -13,7 +14,7 @@ class Sqlite3Client(ClientClass):
     ENGINE = 'Sqlite3'
 
     def __init__(self, filename):
-        if not filename:
+        if not filename or filename == ':memory:':
             # No file path → keep everything in a single in-memory database.
             # A persistent connection is required because a fresh `:memory:`
             # connection per statement would start from an empty DB each time.
@@ -24,20 +25,56 @@ class Sqlite3Client(ClientClass):
             self.dbname = filename
             self.in_memory = False
             self._conn = None
+        self._owns_conn = True
 
     def get_connection(self) -> sqlite3.Connection:
         # Reuse the persistent connection (in-memory) if one already exists,
         # otherwise open a fresh connection for a file-based database.
         if getattr(self, '_conn', None) is not None:
             return self._conn
-        conn = sqlite3.connect(self.dbname, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return sqlite3.connect(self.dbname, check_same_thread=False)
 
     async def get_table_columns(self, table_name: str, database: str = None):
         result = await self.execute(f"PRAGMA table_info({table_name})")
         return [f"{row['name']}" for row in result.data]
 
+    async def get_schema_columns(self, database: Optional[str] = None) -> Optional[dict[str, list[str]]]:
+        result = await self.execute("""
+            SELECT m.name AS tbl, p.name AS col
+            FROM sqlite_master m JOIN pragma_table_info(m.name) p
+            WHERE m.type = 'table'
+            ORDER BY m.name, p.cid
+        """)
+
+        schema = {}
+        for row in result.data:
+            schema.setdefault(row['tbl'], []).append(row['col'])
+        return schema
+
+    async def get_schema_versions(self, database: Optional[str] = None) -> Optional[dict[str, str]]:
+        # The stored CREATE statement is rewritten by every ALTER TABLE
+        result = await self.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")
+        return {row['name']: row['sql'] or '' for row in result.data}
+
+    def clone(self) -> 'Sqlite3Client':
+        # A file database gets a connection per statement, so the copy is
+        # already independent.  An in-memory database only exists inside its
+        # one connection: the copy has to share it (sqlite3 serialises the
+        # statements and each one commits), but must not close it.
+        other = super().clone()
+        other._owns_conn = False
+        return other
+
+    async def close(self) -> None:
+        if self._conn is not None and self._owns_conn:
+            self._conn.close()
+        self._conn = None
+
+    def get_cache_key(self) -> Optional[str]:
+        if self.in_memory:
+            return None
+        return f'{self.ENGINE}:{os.path.abspath(self.dbname)}'
+
     async def get_tables(self, database=None) -> Result:
         return await self.execute(
             "SELECT name AS 'table', '%s' AS database FROM sqlite_master WHERE type='table';" % self.dbname
@@ -74,15 +111,36 @@ class Sqlite3Client(ClientClass):
         cur = conn.cursor()
         cur.execute(sql)
         rowcount = cur.rowcount
-        data = [dict(x) for x in cur.fetchall()]
+        rows = cur.fetchall()
+        names = [col[0] for col in cur.description or ()]
         if rowcount <= 0:
-            rowcount = len(data)
+            rowcount = len(rows)
         if self._conn is not None:
             conn.commit()
         else:
             conn.close()
 
-        return Result(data, rowcount)
+        return Result.from_tuples(names, rows, rowcount)
+
+    def _bulk_insert_sync(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        conn = self.get_connection()
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            self.quote_name(table),
+            ', '.join(self.quote_name(col) for col in columns),
+            ', '.join('?' * len(columns)),
+        )
+        try:
+            # One transaction per batch: committed together or rolled back
+            with conn:
+                conn.executemany(sql, rows)
+        finally:
+            if self._conn is None:
+                conn.close()
+
+        return Result(rowcount=len(rows))
+
+    async def bulk_insert(self, table: str, columns: list[str], rows: list[tuple]) -> Result:
+        return await asyncio.to_thread(self._bulk_insert_sync, table, columns, rows)
 
     def is_db_error_exception(self, exc: Exception) -> bool:
         return isinstance(exc, sqlite3.DatabaseError)
@@ -29,6 +29,7 @@ from .pipeline import scan_line_code_and_triple
 from .pipeline import PipelineExecutor
 from .pipeline import PipelineStepError
 from .pipeline import HELP_ENTRIES
+from .result_cache import ResultCache, is_read_only
 
 
 warnings.filterwarnings("ignore")
@@ -37,6 +38,7 @@ warnings.filterwarnings("ignore")
 class DbFn(str, enum.Enum):
     """Named DbEditor functions."""
     RUN_QUERY       = 'run_query'
+    REFRESH_QUERY   = 'refresh_query'
     SHOW_TABLES     = 'show_tables'
     SHOW_DATABASES  = 'show_databases'
     SHOW_PREDICTION = 'show_prediction'
@@ -51,9 +53,17 @@ class Task:
         self.coro = coro
         self.loop = loop
         self.task = None
+        self._cancel_requested = False
 
     def cancel(self):
-        self.loop.call_soon_threadsafe(self.task.cancel)
+        self.loop.call_soon_threadsafe(self._cancel)
+
+    def _cancel(self):
+        # Runs on the loop thread, possibly before run() has created the task
+        if self.task is None:
+            self._cancel_requested = True
+        else:
+            self.task.cancel()
 
     def is_done(self):
         if self.task is None:
@@ -66,6 +76,8 @@ class Task:
 
     async def run(self):
         self.task = asyncio.create_task(self.coro)
+        if self._cancel_requested:
+            self.task.cancel()
         return self.task
 
 
@@ -74,9 +86,11 @@ class AsyncLoopThread(threading.Thread):
         super().__init__(*args, **kwargs)
         self.current_running_task = None
         self.loop = None
+        self.ready = threading.Event()
 
     async def _run(self):
         self.loop = asyncio.get_event_loop()
+        self.ready.set()
         # Keep the event loop alive so run_coroutine_threadsafe() can
         # submit coroutines from the main thread at any time.
         while True:
@@ -94,6 +108,7 @@ class AsyncLoopThread(threading.Thread):
         return False
 
     def submit(self, coro: asyncio.coroutines):
+        self.ready.wait()
         task = Task(coro, self.loop)
         asyncio.run_coroutine_threadsafe(task.run(), loop=self.loop)
         return task
@@ -238,6 +253,7 @@ def get_word_parts(buf) -> list:
 
 DB_HELP_DATABASE = """\
   `Alt+R`               Execute query at cursor (or selection)
+  `Alt+Shift+R`         Execute query, bypassing the result cache
   `Shift+Tab` / `Alt+1`   DB autocomplete (tables, columns, functions)
   `Alt+T`               Browse tables
   `Alt+E`               Browse databases
@@ -471,6 +487,8 @@ class LockScreen:
 class DbEditor(Editor):
     # Sentinel insert value for the "+ Create new sheet" entry in the sheets popup.
     _NEW_SHEET = '+new'
+    # Seconds without edits or cursor moves before suggestions are precomputed
+    SPECULATE_DELAY = 0.4
 
     def __init__(
         self,
@@ -483,16 +501,23 @@ class DbEditor(Editor):
         lock_init_command: Optional[str] = None,
         lock_timeout: Optional[float] = None,
         lock_check_command: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
     ):
         visidata.vd.addGlobals(dbeditor=self)
         self.client = client
         self.autocomplete = autocomplete
+        # Opt-in (--result-cache-ttl); only touched from the asyncio loop thread
+        self.result_cache = result_cache
         self.asyncloop_thread = AsyncLoopThread(daemon=True)
         self.asyncloop_thread.start()
         self.vars = {}
         # (name, rows) sheets requested by the pipeline's .SHEET command during the
         # current run; built into VisiData sheets in _db_query's on_done.
         self._pipeline_sheets = []
+        # Speculative autocomplete: (buffer version, row, col) -> Task
+        self._spec_key = None
+        self._spec_since = 0.0
+        self._spec_task = None
         if remap_config:
             self.apply_keys_remap(remap_config)
 
@@ -509,7 +534,10 @@ class DbEditor(Editor):
         self.add_editor_function(DbFn.SHOW_TABLES,     self._db_show_tables,    'Browse tables',  'Alt+T')
         self.add_editor_function(DbFn.SHOW_DATABASES,  self._db_show_databases, 'Browse databases', 'Alt+E')
         self.add_editor_function(DbFn.SHOW_PREDICTION, self._db_show_prediction,'Autocomplete','Shift+Tab / Alt+1')
+        self.add_editor_function(DbFn.REFRESH_QUERY,   partial(self._db_query, refresh=True),
+                                 'Execute query, bypassing the result cache', 'Alt+Shift+R')
         self.add_keybinding(DbFn.RUN_QUERY,       key_alt(ord('r')))              # Alt+R
+        self.add_keybinding(DbFn.REFRESH_QUERY,   key_alt(ord('R')))              # Alt+Shift+R
         self.add_keybinding(DbFn.SHOW_TABLES,     key_alt(ord('t')))              # Alt+T
         self.add_keybinding(DbFn.SHOW_DATABASES,  key_alt(ord('e')))              # Alt+E
         self.add_keybinding(DbFn.SHOW_PREDICTION, [key_alt(ord('1')), K(353)])   # Alt+1, Shift+Tab
@@ -519,6 +547,7 @@ class DbEditor(Editor):
         if self.client:
             self.set_status_name(self.client.get_title())
             self.set_words(keywords=self.client.all_commands, functions=self.client.all_functions)
+            self._prefetch_schema()
 
     def apply_keys_remap(self, remap_str: str):
         if not remap_str:
@@ -585,6 +614,7 @@ class DbEditor(Editor):
             )
         else:
             self.set_cursor_line(0, 0)
+        self._speculate()
 
     def _fix_visidata_curses(self) -> None:
         try:
@@ -615,7 +645,21 @@ class DbEditor(Editor):
         self.colors.reset()
         self._apply_termios()         # restore termios after visidata resets it
 
-    def _db_query(self):
+    def invalidate_result_cache(self):
+        """Forget cached query results after data was written outside
+        _db_query (e.g. a VisiData bulk load).  Safe from any thread."""
+        if self.result_cache is not None:
+            self.asyncloop_thread.loop.call_soon_threadsafe(self.result_cache.clear)
+
+    def _prefetch_schema(self):
+        """Warm the autocomplete cache for the current database in the background."""
+        if self.autocomplete is not None:
+            self.asyncloop_thread.submit(self.autocomplete.prefetch_schema(self.client.dbname))
+
+    def _db_query(self, refresh: bool = False):
+        """Run the query at the cursor.  With *refresh* a cached result is not
+        reused (the fresh one replaces it)."""
+        self._cancel_speculation()
         sel = self.buf.get_selected_text() if self.buf.has_selection() else ''
         if not sel:
             sel = get_expression_under_cursor(self.buf)
@@ -623,13 +667,37 @@ class DbEditor(Editor):
             self.set_status_notification('Nothing to execute')
             return
         start = time.time()
+        dbname_before = self.client.dbname
+        cached_age = None
 
         async def fetch_all():
+            nonlocal cached_age
             sql = sel.strip()
+            cache = self.result_cache
             if is_pipeline(sql):
+                if cache is not None:
+                    cache.clear()   # any step may write
                 executor = PipelineExecutor(self)
                 return await executor.execute(sql)
 
+            if cache is None:
+                return await fetch(sql)
+            key = cache.key(self.client, sql)
+            if key is None:
+                if not is_read_only(sql):
+                    cache.clear()
+                return await fetch(sql)
+            if not refresh:
+                hit = cache.get(key)
+                if hit is not None:
+                    result, cached_age = hit
+                    return result
+            result = await fetch(sql)
+            cache.put(key, result)
+            # VisiData edits rows in place; the cached result must stay as fetched
+            return result.copy()
+
+        async def fetch(sql):
             result = await self.client.execute(sql)
             if not (self.client.SUPPORTS_SERVER_SIDE_PAGING and result.has_more):
                 return result
@@ -662,6 +730,7 @@ class DbEditor(Editor):
                     return
                 result = task.result()
                 message = str(result)
+                result_rows = result.view_rows() if result else None
                 if self._pipeline_sheets:
                     # .SHEET was used: open each requested sheet (named), plus the
                     # pipeline's final result on top, then hand control to VisiData.
@@ -669,13 +738,13 @@ class DbEditor(Editor):
                     vd_launched = True
                     for name, rows in self._pipeline_sheets:
                         visidata.vd.push(visidata.PyobjSheet(name, source=rows))
-                    if result and result.data:
-                        visidata.vd.push(visidata.PyobjSheet('result', source=result.data))
+                    if result_rows:
+                        visidata.vd.push(visidata.PyobjSheet('result', source=result_rows))
                     visidata.vd.run(visidata.vd.sheets[0])
-                elif result and result.data:
+                elif result_rows:
                     self._fix_visidata_curses()
                     vd_launched = True
-                    visidata.vd.view(result.data)
+                    visidata.vd.view(result_rows)
             except (asyncio.CancelledError, asyncio.InvalidStateError):
                 message = 'Cancelled'
             except Exception as exc:
@@ -685,14 +754,21 @@ class DbEditor(Editor):
                     message = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
                 self.info_popup.open('Error', {'main': message})
             finally:
+                if self.client.dbname != dbname_before:
+                    self._prefetch_schema()
                 self.set_status_name(self.client.get_title())
+                if cached_age is not None:
+                    message = f'[cached {round(cached_age)}s ago]  {message}'
                 self.set_status_notification(f'{round(end - start, 2)}s  {message}')
                 if vd_launched:
                     self._fix_curses_after_visidata()
 
         self.open_running_popup(task, start, on_done)
 
-    def _db_show_prediction(self):
+    def _cursor_key(self) -> tuple:
+        return self.buf.version, self.buf.cursor_row, self.buf.cursor_col
+
+    def _prediction_args(self) -> tuple:
         parts = get_word_parts(self.buf)
         word = parts[-1] if parts else ''
         before_cursor = get_sql_before_cursor(self.buf)
@@ -701,15 +777,56 @@ class DbEditor(Editor):
             sql_context = before_cursor[:-len(word)].rstrip()
         else:
             sql_context = before_cursor
-
-        task = self.asyncloop_thread.submit(
+        return parts, sql_context, full_sql
+
+    def _cancel_speculation(self):
+        if self._spec_task is not None and not self._spec_task.is_done():
+            self._spec_task.cancel()
+        self._spec_task = None
+
+    def _speculate(self):
+        """Once typing pauses, compute suggestions for the cursor position in
+        the background so an explicit request can be answered at once.  Any
+        edit or cursor move cancels the computation in flight."""
+        if self.autocomplete is None:
+            return
+        key = self._cursor_key()
+        if key != self._spec_key:
+            self._cancel_speculation()
+            self._spec_key = key
+            self._spec_since = time.monotonic()
+            return
+        if self._spec_task is not None or self.popup.active or self.running_popup.active:
+            return
+        if time.monotonic() - self._spec_since < self.SPECULATE_DELAY:
+            return
+        parts, sql_context, full_sql = self._prediction_args()
+        if not full_sql.strip():
+            return
+        self._spec_task = self.asyncloop_thread.submit(
             self.autocomplete.get_suggestions(parts, sql_context=sql_context, full_sql=full_sql)
         )
+
+    def _take_speculation(self):
+        """Return the speculative task for the current cursor position, if it
+        is still running or has succeeded."""
+        task, self._spec_task = self._spec_task, None
+        if task is None or self._spec_key != self._cursor_key():
+            return None
+        if task.is_done() and (task.task.cancelled() or task.task.exception() is not None):
+            return None
+        return task
+
+    def _db_show_prediction(self):
+        task = self._take_speculation()
+        if task is None:
+            parts, sql_context, full_sql = self._prediction_args()
+            task = self.asyncloop_thread.submit(
+                self.autocomplete.get_suggestions(parts, sql_context=sql_context, full_sql=full_sql)
+            )
         start = time.time()
 
-        def on_done():
-            if self.running_popup.cancelled:
-                return
+        def show():
             try:
                 candidates = task.result()
             except Exception as exc:
@@ -721,7 +838,14 @@ class DbEditor(Editor):
             ]
             self.show_autocomplete(items)
 
-        self.open_running_popup(task, start, on_done)
+        def on_done():
+            if not self.running_popup.cancelled:
+                show()
+
+        if task.is_done():
+            show()
+        else:
+            self.open_running_popup(task, start, on_done)
 
     def get_sheets(self) -> 'List[str]':
         """Return names of currently open VisiData sheets. Override to provide actual data."""
@@ -828,6 +952,10 @@ def main():
         help='seconds of inactivity before the screen locks')
     parser.add_argument('--lock-check-command', dest='lock_check_command', default=None,
         help='shell command to verify a lock session (receives same secret via stdin, must output same code)')
+    parser.add_argument('--result-cache-ttl', dest='result_cache_ttl', type=float, default=None,
+        help='reuse SELECT/SHOW/DESCRIBE results for this many seconds (default: no result cache)')
+    parser.add_argument('--result-cache-size', dest='result_cache_size', type=float, default=None,
+        help='memory budget of the result cache in MB (default: 64)')
 
     args = parser.parse_args()
     env_override(args)
@@ -872,6 +1000,10 @@ def main():
             args.lock_timeout = config.get('lock_timeout', None)
         if not args.lock_check_command:
             args.lock_check_command = config.get('lock_check_command', None)
+        if args.result_cache_ttl is None:
+            args.result_cache_ttl = config.get('result_cache_ttl', None)
+        if args.result_cache_size is None:
+            args.result_cache_size = config.get('result_cache_size', None)
 
     # lock_timeout may arrive as a string (env var / JSON string) — coerce once
     # so every downstream consumer gets a float.
@@ -883,6 +1015,24 @@ def main():
                   file=sys.stderr)
             sys.exit(1)
 
+    # Same for the result cache settings
+    for name in ('result_cache_ttl', 'result_cache_size'):
+        value = getattr(args, name)
+        if value is not None:
+            try:
+                setattr(args, name, float(value))
+            except (TypeError, ValueError):
+                print(f'Error: --{name.replace("_", "-")} must be a number, got {value!r}',
+                      file=sys.stderr)
+                sys.exit(1)
+
+    result_cache = None
+    if args.result_cache_ttl:
+        max_bytes = ResultCache.DEFAULT_MAX_BYTES
+        if args.result_cache_size is not None:
+            max_bytes = int(args.result_cache_size * 1024 * 1024)
+        result_cache = ResultCache(args.result_cache_ttl, max_bytes)
+
     if not engine:
         engine = 'sqlite3'
 
@@ -936,6 +1086,7 @@ def main():
                 lock_init_command=args.lock_init_command,
                 lock_timeout=args.lock_timeout,
                 lock_check_command=args.lock_check_command,
+                result_cache=result_cache,
             ).run()
         )
     except RuntimeError as e:
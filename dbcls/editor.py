@@ -2,8 +2,10 @@
 """Terminal SQL text editor — pure Python, stdlib only."""
 
 from contextlib import contextmanager
+import bisect
 import curses
 import enum
+import heapq
 import locale
 import os
 import re
@@ -132,6 +134,7 @@ File
 Search
   `Ctrl+F`                  Open search bar
   `Up / Down`               Previous / next match
+  `Alt+R / Alt+W`           Toggle regex / whole-word matching
   `Enter / Esc`             Close search bar
 
 Other
@@ -316,10 +319,20 @@ Token = Tuple[int, int, str]  # (start_col, end_col, type_str)
 
 class Lexer:
     OPERATORS = set('+-*/=<>!|&~@#%^')
+    # Block state before every CHECKPOINT_INTERVAL-th line is precomputed by
+    # HighlightWorker, so the UI thread never tokenizes more than this many
+    # lines to resolve the state of a line it is about to draw.
+    CHECKPOINT_INTERVAL = 500
+    # Returned by get_block_comment_before() when the state is not known yet.
+    PENDING = object()
 
     def __init__(self):
         self._cache = {}  # line_idx -> (line_text, tokens, comment_open_after)
         self._block_comment_state = {}  # line_idx -> comment_open_before
+        self._checkpoints = {0: False}  # line_idx -> block state before that line
+        self._checkpoints_lock = threading.Lock()
+        self._generation = 0  # bumped on every invalidate(); stale worker passes stop
+        self.on_pending: Optional[Callable[[], None]] = None  # wakes the worker
         self._keywords  = []
         self._types     = []
         self._functions = []
@@ -348,27 +361,75 @@ class Lexer:
         keys2 = [k for k in self._block_comment_state if k >= from_line]
         for k in keys2:
             del self._block_comment_state[k]
-
-    def get_block_comment_before(self, line_idx: int, lines: List[str]) -> bool:
+        # A checkpoint holds the state *before* its line, so one sitting on
+        # from_line itself is still valid.
+        with self._checkpoints_lock:
+            self._generation += 1
+            for k in [k for k in self._checkpoints if k > from_line]:
+                del self._checkpoints[k]
+        if self.on_pending:
+            self.on_pending()
+
+    def _nearest_known_state(self, line_idx: int):
+        """Return (start, state) — the closest line at or before *line_idx*
+        whose preceding block state is known — or (None, None) when nothing
+        is known within CHECKPOINT_INTERVAL lines."""
+        checkpoint = line_idx - line_idx % self.CHECKPOINT_INTERVAL
+        for i in range(line_idx - 1, checkpoint - 1, -1):
+            if i in self._block_comment_state:
+                return i + 1, self._block_comment_state[i]
+        state = self._checkpoints.get(checkpoint, self.PENDING)
+        if state is not self.PENDING:
+            return checkpoint, state
+        return None, None
+
+    def get_block_comment_before(self, line_idx: int, lines: List[str]):
+        """Return the block state before *line_idx*, or ``Lexer.PENDING`` when
+        resolving it would mean tokenizing the file from far above — the
+        background worker is woken to fill in the missing checkpoints."""
         if line_idx == 0:
             return False
         if line_idx - 1 in self._block_comment_state:
             return self._block_comment_state[line_idx - 1]
-        # recompute from last known good state
-        start = 0
-        for i in range(line_idx - 1, -1, -1):
-            if i in self._block_comment_state:
-                start = i + 1
-                break
-        state = self._block_comment_state.get(start - 1, False) if start > 0 else False
+        start, state = self._nearest_known_state(line_idx)
+        if start is None:
+            if self.on_pending:
+                self.on_pending()
+            return self.PENDING
         for i in range(start, line_idx):
             _, _, state = self._tokenize_line(lines[i], state)
             self._block_comment_state[i] = state
         return state
 
+    def fill_checkpoints(self, lines: List[str]) -> None:
+        """Compute missing checkpoints from the top of *lines*.  Runs on the
+        HighlightWorker thread and gives up as soon as the buffer changes."""
+        step = self.CHECKPOINT_INTERVAL
+        with self._checkpoints_lock:
+            generation = self._generation
+            start = 0
+            while start + step in self._checkpoints:
+                start += step
+            state = self._checkpoints[start]
+        try:
+            for i in range(start, len(lines)):
+                if i % step == 0 and i > start:
+                    with self._checkpoints_lock:
+                        if generation != self._generation:
+                            return
+                        self._checkpoints[i] = state
+                    time.sleep(0)  # let the UI thread grab the GIL
+                _, _, state = self._tokenize_line(lines[i], state)
+        except IndexError:
+            # Lines were removed under us; invalidate() has already bumped
+            # the generation and will wake the worker again.
+            return
+
     def get_tokens(self, line_idx: int, lines: List[str]) -> List[Token]:
         line = lines[line_idx] if line_idx < len(lines) else ''
         bc_before = self.get_block_comment_before(line_idx, lines)
+        if bc_before is self.PENDING:
+            return []  # drawn as plain text until the worker catches up
         if line_idx in self._cache:
             cached_line, cached_tokens, _ = self._cache[line_idx]
             if cached_line == line:
@@ -567,6 +628,80 @@ class Lexer:
         return tokens, block_state, block_state
 
 
+class HighlightWorker(threading.Thread):
+    """Background thread that keeps Lexer checkpoints filled for the current
+    buffer, so jumping deep into a large file never tokenizes everything
+    above it on the UI thread.  Lines whose state is still pending are drawn
+    as plain text; the main loop redraws every tick and picks up the colours
+    once the worker has caught up."""
+
+    DEBOUNCE = 0.05  # seconds to let a burst of keystrokes settle
+
+    def __init__(self, lexer: Lexer, buf: 'TextBuffer'):
+        super().__init__(daemon=True)
+        self.lexer = lexer
+        self.buf = buf
+        self._wake = threading.Event()
+        self._stopped = False
+        lexer.on_pending = self._wake.set
+
+    def run(self):
+        while not self._stopped:
+            self._wake.wait()
+            time.sleep(self.DEBOUNCE)
+            self._wake.clear()
+            if self._stopped:
+                break
+            self.lexer.fill_checkpoints(self.buf.lines)
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+
+# ─── WordIndex ────────────────────────────────────────────────────────────────
+class WordIndex:
+    """Identifiers (3+ chars) used anywhere in the buffer, for local completion.
+
+    Each line's word set is kept alongside the line; ``counts`` records how many
+    lines contain each word, so splicing lines in or out only touches the words
+    of the lines involved.
+    """
+
+    WORD_RE = re.compile(r'\w{3,}')
+
+    def __init__(self):
+        self._line_words: List[frozenset] = []
+        self.counts: dict = {}
+
+    def _words_of(self, line: str) -> frozenset:
+        return frozenset(self.WORD_RE.findall(line)) if len(line) >= 3 else frozenset()
+
+    def reset(self, lines: List[str]):
+        self._line_words = []
+        self.counts = {}
+        self.splice(0, 0, lines)
+
+    def splice(self, start: int, stop: int, new_lines: List[str]):
+        """Mirror ``lines[start:stop] = new_lines``."""
+        counts = self.counts
+        for words in self._line_words[start:stop]:
+            for w in words:
+                n = counts[w] - 1
+                if n:
+                    counts[w] = n
+                else:
+                    del counts[w]
+        added = [self._words_of(line) for line in new_lines]
+        for words in added:
+            for w in words:
+                counts[w] = counts.get(w, 0) + 1
+        self._line_words[start:stop] = added
+
+    def words(self):
+        return self.counts.keys()
+
+
 # ─── TextBuffer ───────────────────────────────────────────────────────────────
 class TextBuffer:
     def __init__(self):
@@ -584,6 +719,9 @@ class TextBuffer:
         self._last_action_time: float = 0.0
         self.preferred_col = 0  # target column preserved across vertical moves
         self.marked_lines: set = set()  # persistent line highlights
+        self.word_index = WordIndex()
+        self.word_index.reset(self.lines)
+        self.version = 0  # bumped on every text change
 
     # ── File I/O ──────────────────────────────────────────────────────────────
     def load(self, filepath: str):
@@ -597,6 +735,8 @@ class TextBuffer:
         self.lines = content.split('\n')
         if not self.lines:
             self.lines = ['']
+        self.word_index.reset(self.lines)
+        self.version += 1
         self.cursor_row = 0
         self.cursor_col = 0
         self.sel_start = self.sel_end = None
@@ -637,7 +777,19 @@ class TextBuffer:
         )
 
     def _restore_snapshot(self, snap: Snapshot):
-        self.lines = snap.lines[:]
+        old, new = self.lines, snap.lines
+        # Snapshots share unchanged line strings, so only the edited middle
+        # needs re-indexing.
+        n = min(len(old), len(new))
+        head = 0
+        while head < n and old[head] is new[head]:
+            head += 1
+        tail = 0
+        while tail < n - head and old[-1 - tail] is new[-1 - tail]:
+            tail += 1
+        self.lines = new[:]
+        self.word_index.splice(head, len(old) - tail, new[head:len(new) - tail])
+        self.version += 1
         self.cursor_row = snap.cursor_row
         self.cursor_col = snap.cursor_col
         self.sel_start = snap.sel_start
@@ -732,10 +884,7 @@ class TextBuffer:
         er, ec = e
         before = self.lines[sr][:sc]
         after = self.lines[er][ec:]
-        new_lines = self.lines[:sr] + [before + after] + self.lines[er+1:]
-        if not new_lines:
-            new_lines = ['']
-        self.lines = new_lines
+        self._splice_lines(sr, er + 1, [before + after])
         self.cursor_row = sr
         self.cursor_col = sc
         self.clear_selection()
@@ -813,13 +962,23 @@ class TextBuffer:
         self.move_cursor(r, c, extend)
 
     # ── Text mutations ────────────────────────────────────────────────────────
+    def _set_line(self, r: int, text: str):
+        self.lines[r] = text
+        self.word_index.splice(r, r + 1, [text])
+        self.version += 1
+
+    def _splice_lines(self, start: int, stop: int, new_lines: List[str]):
+        self.lines[start:stop] = new_lines
+        self.word_index.splice(start, stop, new_lines)
+        self.version += 1
+
     def insert_char(self, ch: str):
         self._push_undo('insert_char')
         if self.has_selection():
             self.delete_selection()
         r, c = self.cursor_row, self.cursor_col
         line = self.lines[r]
-        self.lines[r] = line[:c] + ch + line[c:]
+        self._set_line(r, line[:c] + ch + line[c:])
         self.cursor_col = c + len(ch)
         self.dirty = True
 
@@ -836,8 +995,7 @@ class TextBuffer:
                 indent += ch
             else:
                 break
-        self.lines[r] = line[:c]
-        self.lines.insert(r + 1, indent + line[c:])
+        self._splice_lines(r, r + 1, [line[:c], indent + line[c:]])
         self.cursor_row = r + 1
         self.cursor_col = len(indent)
         self.dirty = True
@@ -851,13 +1009,12 @@ class TextBuffer:
         r, c = self.cursor_row, self.cursor_col
         if c > 0:
             line = self.lines[r]
-            self.lines[r] = line[:c-1] + line[c:]
+            self._set_line(r, line[:c-1] + line[c:])
             self.cursor_col = c - 1
         elif r > 0:
             prev = self.lines[r - 1]
             self.cursor_col = len(prev)
-            self.lines[r-1] = prev + self.lines[r]
-            self.lines.pop(r)
+            self._splice_lines(r - 1, r + 1, [prev + self.lines[r]])
             self.cursor_row = r - 1
         self.dirty = True
 
@@ -870,10 +1027,9 @@ class TextBuffer:
         r, c = self.cursor_row, self.cursor_col
         line = self.lines[r]
         if c < len(line):
-            self.lines[r] = line[:c] + line[c+1:]
+            self._set_line(r, line[:c] + line[c+1:])
         elif r < len(self.lines) - 1:
-            self.lines[r] = line + self.lines[r+1]
-            self.lines.pop(r + 1)
+            self._splice_lines(r, r + 2, [line + self.lines[r+1]])
         self.dirty = True
 
     def insert_text(self, text: str):
@@ -884,16 +1040,12 @@ class TextBuffer:
         r, c = self.cursor_row, self.cursor_col
         line = self.lines[r]
         if len(parts) == 1:
-            self.lines[r] = line[:c] + parts[0] + line[c:]
+            self._set_line(r, line[:c] + parts[0] + line[c:])
             self.cursor_col = c + len(parts[0])
         else:
             before = line[:c] + parts[0]
             after = parts[-1] + line[c:]
-            middle = parts[1:-1]
-            self.lines[r] = before
-            for i, p in enumerate(middle):
-                self.lines.insert(r + 1 + i, p)
-            self.lines.insert(r + 1 + len(middle), after)
+            self._splice_lines(r, r + 1, [before] + parts[1:-1] + [after])
             self.cursor_row = r + len(parts) - 1
             self.cursor_col = len(parts[-1])
         self.dirty = True
@@ -911,7 +1063,7 @@ class TextBuffer:
                 end += 1
         if end > c:
             self._push_undo('delete_word')
-            self.lines[r] = line[:c] + line[end:]
+            self._set_line(r, line[:c] + line[end:])
             self.dirty = True
 
     def kill_word_backward(self):
@@ -923,8 +1075,7 @@ class TextBuffer:
                 return
             self._push_undo('delete_word')
             prev = self.lines[r - 1]
-            self.lines[r - 1] = prev + self.lines[r]
-            del self.lines[r]
+            self._splice_lines(r - 1, r + 1, [prev + self.lines[r]])
             self.cursor_row = r - 1
             self.cursor_col = len(prev)
             self.dirty = True
@@ -939,7 +1090,7 @@ class TextBuffer:
                 start -= 1
         if start < c:
             self._push_undo('delete_word')
-            self.lines[r] = line[:start] + line[c:]
+            self._set_line(r, line[:start] + line[c:])
             self.cursor_col = start
             self.dirty = True
 
@@ -958,7 +1109,7 @@ class TextBuffer:
             start -= 1
         if start < c:
             self._push_undo('delete_word')
-            self.lines[r] = line[:start] + line[c:]
+            self._set_line(r, line[:start] + line[c:])
             self.cursor_col = start
             self.dirty = True
 
@@ -972,40 +1123,57 @@ class TextBuffer:
         return line[start:c]
 
     def document_words(self):
-        words = set()
-        for line in self.lines:
-            tok = ''
-            for ch in line:
-                if ch.isalnum() or ch == '_':
-                    tok += ch
-                else:
-                    if len(tok) >= 3:
-                        words.add(tok)
-                    tok = ''
-            if len(tok) >= 3:
-                words.add(tok)
-        return words
+        return self.word_index.words()
 
 
 # ─── Clipboard ────────────────────────────────────────────────────────────────
 class Clipboard:
     """System clipboard via pbcopy/pbpaste (macOS), xclip/xsel (Linux), clip/powershell (Windows).
-    Falls back to internal buffer if no system tool is available."""
+    Falls back to internal buffer if no system tool is available.
+
+    Helper processes run on a background thread so the UI never waits on them:
+    ``copy()`` returns immediately (only the newest pending copy is written),
+    and ``paste()`` hands its result to a callback that :meth:`poll` runs on
+    the UI thread.  Over SSH — or with ``DBCLS_CLIPBOARD=osc52`` — copies are
+    also sent to the local terminal as an OSC 52 escape sequence.
+    """
+
+    CHUNK = 1 << 16          # bytes per write to the helper's stdin
+    PASTE_TIMEOUT = 2.0      # seconds before falling back to the internal copy
+    OSC52_MAX = 1 << 20      # terminals drop larger OSC 52 payloads anyway
+
+    _backend_cache: Optional[str] = None
 
     def __init__(self):
         self._internal: Optional[str] = None
         self._backend = self._detect_backend()
+        self._osc52 = self._osc52_enabled()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending_copy: Optional[str] = None
+        self._pending_paste: List[Callable[[Optional[str]], None]] = []
+        self._results: List[Tuple[Callable[[Optional[str]], None], Optional[str]]] = []
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def _detect_backend(cls) -> str:
+        if cls._backend_cache is None:
+            cls._backend_cache = cls._probe_backend()
+        return cls._backend_cache
 
     @staticmethod
-    def _detect_backend() -> str:
+    def _probe_backend() -> str:
         import shutil
         if sys.platform == 'darwin':
             return 'pbcopy' if shutil.which('pbcopy') else 'internal'
         if sys.platform.startswith('linux'):
-            if shutil.which('xclip'):
-                return 'xclip'
-            if shutil.which('xsel'):
-                return 'xsel'
+            if os.environ.get('WAYLAND_DISPLAY') and shutil.which('wl-copy'):
+                return 'wl'
+            if os.environ.get('DISPLAY') or not os.environ.get('SSH_TTY'):
+                if shutil.which('xclip'):
+                    return 'xclip'
+                if shutil.which('xsel'):
+                    return 'xsel'
             if shutil.which('wl-copy'):      # Wayland
                 return 'wl'
             return 'internal'
@@ -1013,120 +1181,408 @@ class Clipboard:
             return 'win'
         return 'internal'
 
+    @staticmethod
+    def _osc52_enabled() -> bool:
+        mode = os.environ.get('DBCLS_CLIPBOARD', '').lower()
+        if mode:
+            return mode == 'osc52'
+        return bool(os.environ.get('SSH_TTY') or os.environ.get('SSH_CONNECTION'))
+
+    _COPY_CMDS = {
+        'pbcopy': ['pbcopy'],
+        'xclip':  ['xclip', '-selection', 'clipboard'],
+        'xsel':   ['xsel', '--clipboard', '--input'],
+        'wl':     ['wl-copy'],
+        'win':    ['clip'],
+    }
+    _PASTE_CMDS = {
+        'pbcopy': ['pbpaste'],
+        'xclip':  ['xclip', '-selection', 'clipboard', '-out'],
+        'xsel':   ['xsel', '--clipboard', '--output'],
+        'wl':     ['wl-paste', '--no-newline'],
+        'win':    ['powershell', '-noprofile', '-command', 'Get-Clipboard'],
+    }
+
+    # ── UI-thread API ─────────────────────────────────────────────────────────
     def copy(self, text: str):
         self._internal = text
+        if self._osc52:
+            self._write_osc52(text)
+        if self._backend in self._COPY_CMDS:
+            with self._lock:
+                self._pending_copy = text
+            self._start_worker()
+
+    def paste(self, on_text: Callable[[Optional[str]], None]):
+        """Read the clipboard in the background; *on_text* runs from :meth:`poll`."""
+        if self._backend not in self._PASTE_CMDS:
+            with self._lock:
+                self._results.append((on_text, self._internal))
+            return
+        with self._lock:
+            self._pending_paste.append(on_text)
+        self._start_worker()
+
+    def poll(self):
+        """Deliver finished pastes.  Call from the UI loop."""
+        if not self._results:
+            return
+        with self._lock:
+            results, self._results = self._results, []
+        for cb, text in results:
+            cb(text)
+
+    def _write_osc52(self, text: str):
+        import base64
+        data = text.encode('utf-8')
+        if len(data) > self.OSC52_MAX:
+            return
+        seq = b'\x1b]52;c;' + base64.b64encode(data) + b'\x07'
+        if os.environ.get('TMUX'):
+            seq = b'\x1bPtmux;\x1b' + seq + b'\x1b\\'
         try:
-            import subprocess
-            if self._backend == 'pbcopy':
-                subprocess.run(['pbcopy'], input=text.encode(), check=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            elif self._backend == 'xclip':
-                subprocess.run(['xclip', '-selection', 'clipboard'],
-                               input=text.encode(), check=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            elif self._backend == 'xsel':
-                subprocess.run(['xsel', '--clipboard', '--input'],
-                               input=text.encode(), check=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            elif self._backend == 'wl':
-                subprocess.run(['wl-copy'],
-                               input=text.encode(), check=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            elif self._backend == 'win':
-                subprocess.run(['clip'], input=text.encode('utf-16-le'), check=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            os.write(sys.stdout.fileno(), seq)
+        except (OSError, ValueError):
+            pass
+
+    # ── Worker thread ─────────────────────────────────────────────────────────
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                text, self._pending_copy = self._pending_copy, None
+                pastes, self._pending_paste = self._pending_paste, []
+            if text is not None:
+                self._system_copy(text)
+            if pastes:
+                result = self._system_paste()
+                if result is None:
+                    result = self._internal
+                with self._lock:
+                    self._results.extend((cb, result) for cb in pastes)
+
+    def _system_copy(self, text: str):
+        import subprocess
+        data = text.encode('utf-16-le') if self._backend == 'win' else text.encode()
+        try:
+            proc = subprocess.Popen(self._COPY_CMDS[self._backend], stdin=subprocess.PIPE,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with proc.stdin:
+                view = memoryview(data)
+                for i in range(0, len(view), self.CHUNK):
+                    proc.stdin.write(view[i:i + self.CHUNK])
+            proc.wait()
         except Exception:
             pass  # keep internal copy as fallback
 
-    def paste(self) -> Optional[str]:
+    def _system_paste(self) -> Optional[str]:
+        import subprocess
         try:
-            import subprocess
-            if self._backend == 'pbcopy':
-                r = subprocess.run(['pbpaste'], capture_output=True, check=True)
-                return r.stdout.decode()
-            elif self._backend == 'xclip':
-                r = subprocess.run(['xclip', '-selection', 'clipboard', '-out'],
-                                   capture_output=True, check=True)
-                return r.stdout.decode()
-            elif self._backend == 'xsel':
-                r = subprocess.run(['xsel', '--clipboard', '--output'],
-                                   capture_output=True, check=True)
-                return r.stdout.decode()
-            elif self._backend == 'wl':
-                r = subprocess.run(['wl-paste', '--no-newline'],
-                                   capture_output=True, check=True)
-                return r.stdout.decode()
-            elif self._backend == 'win':
-                r = subprocess.run(
-                    ['powershell', '-noprofile', '-command', 'Get-Clipboard'],
-                    capture_output=True, check=True)
-                return r.stdout.decode().rstrip('\r\n')
+            r = subprocess.run(self._PASTE_CMDS[self._backend], capture_output=True,
+                               check=True, timeout=self.PASTE_TIMEOUT)
         except Exception:
-            pass
-        return self._internal
+            return None
+        text = r.stdout.decode()
+        if self._backend == 'win':
+            text = text.rstrip('\r\n')
+        return text
+
+
+# ─── SearchEngine ─────────────────────────────────────────────────────────────
+class SearchEngine:
+    """Incremental in-buffer matcher behind SearchBar.
+
+    Matches are kept per row (``rows[row] -> [(col_start, col_end), ...]``) so
+    the renderer only looks at the rows it draws.  A new query scans the
+    viewport first; the remaining rows are scanned by :meth:`step` from the
+    editor's idle loop in small time-boxed slices (viewport bottom to EOF,
+    then the top of the file down to the viewport).  When a plain query
+    just grows, only rows that matched the previous query are re-checked.
+    """
+
+    STEP_BUDGET = 0.01   # seconds of scanning per step() call
+    CHECK_EVERY = 256    # rows between time-budget checks
+
+    def __init__(self):
+        self.query = ''
+        self.regex = False
+        self.whole_word = False
+        self.error = ''
+        self.rows: dict = {}                 # row -> [(cs, ce), ...]
+        self.row_keys: List[int] = []        # sorted rows that have matches
+        self.total = 0
+        self._needle = ''                    # lowercased plain query
+        self._pattern = None                 # compiled re.Pattern for regex / whole-word
+        self._done = bytearray()             # 1 for every row scanned for the current query
+        self._order: List[range] = []        # rows still to scan, in order
+        self._prev_rows: Optional[dict] = None   # refinement source (plain mode only)
+        self._prev_done: Optional[bytearray] = None
+
+    @property
+    def scanning(self) -> bool:
+        return bool(self._order)
+
+    def reset(self):
+        self.query = ''
+        self.error = ''
+        self._clear()
+        self._order = []
+
+    def _clear(self):
+        self.rows = {}
+        self.row_keys = []
+        self.total = 0
+
+    def _compile(self) -> bool:
+        self.error = ''
+        self._needle = self.query.lower()
+        self._pattern = None
+        if not self.regex and not self.whole_word:
+            return True
+        source = self.query if self.regex else re.escape(self.query)
+        if self.whole_word:
+            source = rf'\b(?:{source})\b'
+        try:
+            self._pattern = re.compile(source, re.IGNORECASE)
+        except re.error as exc:
+            self.error = str(exc)
+            return False
+        return True
+
+    def set_query(self, query: str, lines: List[str], viewport: Tuple[int, int]):
+        """Start matching *query*.  The viewport rows are scanned right away."""
+        refinable = (
+            not self.regex and not self.whole_word
+            and self.query and query.startswith(self.query)
+        )
+        if refinable:
+            self._prev_rows, self._prev_done = self.rows, self._done
+        else:
+            self._prev_rows = self._prev_done = None
+        self.query = query
+        self._restart(lines, viewport)
+
+    def set_modes(self, lines: List[str], viewport: Tuple[int, int],
+                  regex: Optional[bool] = None, whole_word: Optional[bool] = None):
+        if regex is not None:
+            self.regex = regex
+        if whole_word is not None:
+            self.whole_word = whole_word
+        self._prev_rows = self._prev_done = None
+        self._restart(lines, viewport)
+
+    def _restart(self, lines: List[str], viewport: Tuple[int, int]):
+        self._clear()
+        n = len(lines)
+        self._done = bytearray(n)
+        self._order = []
+        if not self.query or not self._compile():
+            return
+        top = max(0, min(viewport[0], n))
+        bottom = max(top, min(viewport[1], n))
+        self._order = [r for r in (range(top, bottom), range(bottom, n), range(0, top)) if r]
+        # The viewport is scanned synchronously so the screen is correct at once.
+        if top < bottom:
+            self._scan_range(lines, self._order.pop(0), None)
+
+    def step(self, lines: List[str]) -> None:
+        """Scan the next slice of pending rows (called from the idle loop)."""
+        deadline = time.monotonic() + self.STEP_BUDGET
+        while self._order:
+            rng = self._order[0]
+            stopped_at = self._scan_range(lines, rng, deadline)
+            if stopped_at is None:
+                self._order.pop(0)
+            else:
+                self._order[0] = range(stopped_at, rng.stop)
+                return
+        self._prev_rows = self._prev_done = None
+
+    def _scan_range(self, lines: List[str], rng: range, deadline: Optional[float]) -> Optional[int]:
+        """Scan *rng*; return the row to resume from if *deadline* passed."""
+        done = self._done
+        prev_rows, prev_done = self._prev_rows, self._prev_done
+        n = min(len(lines), len(done))
+        for row in rng:
+            if deadline is not None and row % self.CHECK_EVERY == 0 and time.monotonic() > deadline:
+                return row
+            if row >= n or done[row]:
+                continue
+            done[row] = 1
+            if prev_done is not None and row < len(prev_done) and prev_done[row]:
+                spans = self._refine_row(lines[row], prev_rows.get(row))
+            else:
+                spans = self._match_line(lines[row])
+            if spans:
+                self.rows[row] = spans
+                bisect.insort(self.row_keys, row)
+                self.total += len(spans)
+        return None
+
+    def _match_line(self, line: str) -> List[Tuple[int, int]]:
+        if self._pattern is not None:
+            return [m.span() for m in self._pattern.finditer(line) if m.end() > m.start()]
+        needle = self._needle
+        ll = line.lower()
+        spans = []
+        pos = ll.find(needle)
+        while pos != -1:
+            spans.append((pos, pos + len(needle)))
+            pos = ll.find(needle, pos + 1)
+        return spans
+
+    def _refine_row(self, line: str, prev_spans) -> List[Tuple[int, int]]:
+        """A longer plain query can only match where the shorter one did."""
+        if not prev_spans:
+            return []
+        needle = self._needle
+        ll = line.lower()
+        return [(cs, cs + len(needle)) for cs, _ in prev_spans if ll.startswith(needle, cs)]
+
+    # ── navigation helpers ───────────────────────────────────────────────────
+
+    def first_at_or_after(self, row: int, col: int) -> Optional[Tuple[int, int, int]]:
+        i = bisect.bisect_left(self.row_keys, row)
+        if i < len(self.row_keys) and self.row_keys[i] == row:
+            for cs, ce in self.rows[row]:
+                if cs >= col:
+                    return row, cs, ce
+            i += 1
+        if i < len(self.row_keys):
+            r = self.row_keys[i]
+            cs, ce = self.rows[r][0]
+            return r, cs, ce
+        return None
+
+    def last_before(self, row: int, col: int) -> Optional[Tuple[int, int, int]]:
+        i = bisect.bisect_right(self.row_keys, row)
+        if i > 0 and self.row_keys[i - 1] == row:
+            for cs, ce in reversed(self.rows[row]):
+                if cs < col:
+                    return row, cs, ce
+            i -= 1
+        if i > 0:
+            r = self.row_keys[i - 1]
+            cs, ce = self.rows[r][-1]
+            return r, cs, ce
+        return None
+
+    def first(self) -> Optional[Tuple[int, int, int]]:
+        return self.first_at_or_after(0, 0)
+
+    def last(self) -> Optional[Tuple[int, int, int]]:
+        if not self.row_keys:
+            return None
+        r = self.row_keys[-1]
+        cs, ce = self.rows[r][-1]
+        return r, cs, ce
+
+    def index_of(self, match: Tuple[int, int, int]) -> int:
+        """0-based position of *match* among all matches found so far."""
+        row, cs, _ = match
+        i = bisect.bisect_left(self.row_keys, row)
+        before = sum(len(self.rows[r]) for r in self.row_keys[:i])
+        spans = self.rows.get(row, ())
+        return before + sum(1 for s, _ in spans if s < cs)
 
 
 # ─── SearchBar ────────────────────────────────────────────────────────────────
 class SearchBar:
     def __init__(self):
         self.active = False
-        self.query = ''
-        self.matches: List[Tuple[int, int, int]] = []
-        self.current_idx = 0
+        self.engine = SearchEngine()
+        self.current: Optional[Tuple[int, int, int]] = None
+        self.viewport: Tuple[int, int] = (0, 0)   # set by the editor every frame
+        self._snap_pending = False
+        self._anchor: Tuple[int, int] = (0, 0)
+
+    @property
+    def query(self) -> str:
+        return self.engine.query
+
+    @property
+    def rows(self) -> dict:
+        return self.engine.rows
+
+    @property
+    def total(self) -> int:
+        return self.engine.total
+
+    def current_index(self) -> int:
+        return self.engine.index_of(self.current) if self.current else -1
 
     def open(self):
         self.active = True
-        self.query = ''
-        self.matches = []
-        self.current_idx = 0
+        self.engine.reset()
+        self.current = None
+        self._snap_pending = False
 
     def close(self):
         self.active = False
 
-    def find_all(self, lines: List[str]):
-        self.matches = []
-        if not self.query:
-            return
-        q = self.query.lower()
-        for row, line in enumerate(lines):
-            ll = line.lower()
-            start = 0
-            while True:
-                pos = ll.find(q, start)
-                if pos == -1:
-                    break
-                self.matches.append((row, pos, pos + len(q)))
-                start = pos + 1
+    def _requery(self, query: str, buf: 'TextBuffer'):
+        self.engine.set_query(query, buf.lines, self.viewport)
+        self.snap_to_nearest(buf)
+
+    def _toggle(self, buf: 'TextBuffer', regex=None, whole_word=None):
+        self.engine.set_modes(buf.lines, self.viewport, regex=regex, whole_word=whole_word)
+        self.snap_to_nearest(buf)
+
+    def step(self, buf: 'TextBuffer'):
+        """Advance the background scan; resolve a pending snap once possible."""
+        self.engine.step(buf.lines)
+        if self._snap_pending:
+            self._resolve_snap(buf)
 
     def snap_to_nearest(self, buf: 'TextBuffer'):
-        if not self.matches:
-            self.current_idx = 0
+        self.current = None
+        if not self.engine.query:
+            self._snap_pending = False
             return
-        cr, cc = buf.cursor_row, buf.cursor_col
-        best = 0
-        for i, (r, cs, ce) in enumerate(self.matches):
-            if (r, cs) >= (cr, cc):
-                best = i
-                break
-        else:
-            best = 0
-        self.current_idx = best
-        r, cs, _ = self.matches[self.current_idx]
-        buf.move_cursor(r, cs)
+        self._anchor = (buf.cursor_row, buf.cursor_col)
+        self._snap_pending = True
+        self._resolve_snap(buf)
+
+    def _resolve_snap(self, buf: 'TextBuffer'):
+        # Rows below the viewport are scanned in order, so the first match at
+        # or after the anchor is final as soon as it is found.  Wrapping to
+        # the top is only safe once the whole buffer has been scanned.
+        match = self.engine.first_at_or_after(*self._anchor)
+        if match is None and not self.engine.scanning:
+            match = self.engine.first()
+        if match is None:
+            if not self.engine.scanning:
+                self._snap_pending = False
+            return
+        self._snap_pending = False
+        self._go(match, buf)
+
+    def _go(self, match, buf: 'TextBuffer'):
+        self.current = match
+        buf.move_cursor(match[0], match[1])
 
     def next_match(self, buf: 'TextBuffer'):
-        if not self.matches:
-            return
-        self.current_idx = (self.current_idx + 1) % len(self.matches)
-        r, cs, _ = self.matches[self.current_idx]
-        buf.move_cursor(r, cs)
+        self._snap_pending = False
+        row, col = (self.current[0], self.current[1] + 1) if self.current \
+            else (buf.cursor_row, buf.cursor_col)
+        match = self.engine.first_at_or_after(row, col) or self.engine.first()
+        if match:
+            self._go(match, buf)
 
     def prev_match(self, buf: 'TextBuffer'):
-        if not self.matches:
-            return
-        self.current_idx = (self.current_idx - 1) % len(self.matches)
-        r, cs, _ = self.matches[self.current_idx]
-        buf.move_cursor(r, cs)
+        self._snap_pending = False
+        row, col = (self.current[0], self.current[1]) if self.current \
+            else (buf.cursor_row, buf.cursor_col)
+        match = self.engine.last_before(row, col) or self.engine.last()
+        if match:
+            self._go(match, buf)
 
     def handle_key(self, key, buf: 'TextBuffer') -> Optional[str]:
         """Returns 'close', 'next', 'prev', or None.
@@ -1141,23 +1597,123 @@ class SearchBar:
         if key == K(curses.KEY_DOWN):
             self.next_match(buf)
             return None
+        if key == key_alt(ord('r')):
+            self._toggle(buf, regex=not self.engine.regex)
+            return None
+        if key == key_alt(ord('w')):
+            self._toggle(buf, whole_word=not self.engine.whole_word)
+            return None
         if key in (K(curses.KEY_BACKSPACE), K(ord('\x7f')), K(ord('\b'))):
-            self.query = self.query[:-1]
-            self.find_all(buf.lines)
-            self.snap_to_nearest(buf)
+            self._requery(self.engine.query[:-1], buf)
             return None
         if key_flags(key) == 0:
             base = key_base(key)
             if base >= 32 and chr(base).isprintable():
-                self.query += chr(base)
-                self.find_all(buf.lines)
-                self.snap_to_nearest(buf)
+                self._requery(self.engine.query + chr(base), buf)
         return None
 
 
+def search_prompt(search: SearchBar) -> str:
+    """Search-bar prompt, showing the active regex (.*) / whole-word (w) modes."""
+    modes = ('.*' if search.engine.regex else '') + ('w' if search.engine.whole_word else '')
+    return f' Search [{modes}]: ' if modes else ' Search: '
+
+
+# ─── FuzzyMatcher ─────────────────────────────────────────────────────────────
+class FuzzyMatcher:
+    """fzf-style subsequence matcher over a fixed list of labels.
+
+    Labels are normalised once.  ``match()`` returns ``(score, index)`` for
+    every label containing each whitespace-separated filter part as a
+    subsequence; higher scores mean tighter matches (consecutive runs, word
+    boundaries and prefixes score best).
+    """
+
+    SCORE_MATCH        = 16
+    BONUS_BOUNDARY     = 8
+    BONUS_CONSECUTIVE  = 6
+    BONUS_PREFIX       = 12
+    PENALTY_GAP        = 1
+    SEPARATORS         = frozenset(' _.-/()[]:,')
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self.upper = [label.upper() for label in labels]
+
+    @staticmethod
+    def parts(filter_text: str) -> List[str]:
+        return [p for p in filter_text.upper().split() if p]
+
+    def _positions(self, idx: int, part: str) -> Optional[List[int]]:
+        text = self.upper[idx]
+        # A plain substring is always the tightest window — prefer it.
+        pos = text.find(part)
+        if pos != -1:
+            return list(range(pos, pos + len(part)))
+        # Greedy forward scan finds the earliest end of a match...
+        pos = -1
+        for ch in part:
+            pos = text.find(ch, pos + 1)
+            if pos == -1:
+                return None
+        # ...then a backward scan from that end pulls the start as close as possible.
+        positions = [pos]
+        for ch in reversed(part[:-1]):
+            pos = text.rfind(ch, 0, pos)
+            positions.append(pos)
+        positions.reverse()
+        return positions
+
+    def _score(self, idx: int, positions: List[int]) -> int:
+        label = self.labels[idx]
+        score = self.BONUS_PREFIX if positions[0] == 0 else 0
+        prev = None
+        for p in positions:
+            score += self.SCORE_MATCH
+            if p == 0 or label[p - 1] in self.SEPARATORS or (
+                label[p - 1].islower() and label[p].isupper()
+            ):
+                score += self.BONUS_BOUNDARY
+            if prev is not None:
+                if p == prev + 1:
+                    score += self.BONUS_CONSECUTIVE
+                else:
+                    score -= self.PENALTY_GAP * (p - prev - 1)
+            prev = p
+        return score
+
+    def match(self, parts: List[str], candidates) -> List[Tuple[int, int]]:
+        """Score *candidates* (label indices) against every filter part."""
+        results = []
+        upper = self.upper
+        for idx in candidates:
+            text = upper[idx]
+            total = 0
+            for part in parts:
+                # Cheap C-level rejection before the Python-level scoring.
+                if len(part) == 1 and part not in text:
+                    break
+                positions = self._positions(idx, part)
+                if positions is None:
+                    break
+                total += self._score(idx, positions)
+            else:
+                results.append((total, idx))
+        return results
+
+    def highlight(self, idx: int, parts: List[str]) -> set:
+        positions = set()
+        for part in parts:
+            found = self._positions(idx, part)
+            if found:
+                positions.update(found)
+        return positions
+
+
 # ─── SelectPopup ────────────────────────────────────────────────────────
 class SelectPopup:
     MAX_VISIBLE = 8
+    TOP_K = 100  # ranked eagerly; the tail is sorted only if the user scrolls to it
 
     def __init__(self):
         self.active = False
@@ -1168,6 +1724,13 @@ class SelectPopup:
         self.scroll_offset = 0
         self._on_select = None
         self._title: str = ''
+        self._matcher: Optional[FuzzyMatcher] = None
+        self._ranked: List[Tuple[tuple, int]] = []   # (sort key, item index) for all matches
+        self._ranked_sorted = False
+        self._filtered_idx: List[int] = []
+        self._prev_filter = ''
+        self._prev_matches: Optional[List[int]] = None
+        self._highlight_cache: dict = {}
 
     def open(self, items: 'List[PopupItem]', filter_text: str = '',
              on_select=None, title: str = '') -> None:
@@ -1176,43 +1739,71 @@ class SelectPopup:
         self.filter_text = filter_text
         self._on_select = on_select
         self._title = title
+        self._matcher = FuzzyMatcher([item.label for item in self.items])
+        self._prev_filter = ''
+        self._prev_matches = None
         self._refilter()
 
     def close(self):
         self.active = False
         self.filter_text = ''
         self.filtered = []
+        self._filtered_idx = []
         self.selected_idx = 0
         self.scroll_offset = 0
         self._on_select = None
+        self._matcher = None
+        self._ranked = []
+        self._prev_matches = None
+        self._highlight_cache = {}
+
+    @property
+    def total(self) -> int:
+        return len(self._ranked)
 
     def _refilter(self):
-        parts = [p for p in self.filter_text.upper().split() if p]
+        parts = FuzzyMatcher.parts(self.filter_text)
+        items = self.items
         if not parts:
-            self.filtered = list(self.items)
+            self._ranked = [((item.weight, 0, i), i) for i, item in enumerate(items)]
+            self._prev_matches = None
         else:
-            self.filtered = [
-                item for item in self.items
-                if all(p in item.label.upper() for p in parts)
-            ]
-        q = parts[0] if parts else ''
-        self.filtered.sort(key=lambda item: (item.weight, 0 if item.label.upper().startswith(q) else 1))
+            # A longer filter can only match a subset of what the shorter one did.
+            if self._prev_matches is not None and self.filter_text.startswith(self._prev_filter):
+                candidates = self._prev_matches
+            else:
+                candidates = range(len(items))
+            scored = self._matcher.match(parts, candidates)
+            self._ranked = [((items[i].weight, -score, len(items[i].label), i), i) for score, i in scored]
+            self._prev_matches = [i for _, i in scored]
+        self._prev_filter = self.filter_text
+        self._ranked_sorted = False
+        self._highlight_cache = {}
         self.selected_idx = 0
         self.scroll_offset = 0
-
-    def _match_positions(self, label: str) -> set:
-        parts = [p for p in self.filter_text.upper().split() if p]
-        label_upper = label.upper()
-        positions = set()
-        for part in parts:
-            start = 0
-            while True:
-                pos = label_upper.find(part, start)
-                if pos == -1:
-                    break
-                for i in range(pos, pos + len(part)):
-                    positions.add(i)
-                start = pos + 1
+        if len(self._ranked) <= self.TOP_K:
+            self._sort_all()
+        else:
+            top = heapq.nsmallest(self.TOP_K, self._ranked)
+            self._filtered_idx = [i for _, i in top]
+            self.filtered = [items[i] for i in self._filtered_idx]
+
+    def _sort_all(self):
+        self._ranked.sort()
+        self._ranked_sorted = True
+        self._filtered_idx = [i for _, i in self._ranked]
+        self.filtered = [self.items[i] for i in self._filtered_idx]
+
+    def _ensure_ranked(self, idx: int):
+        """Make sure self.filtered is materialised past *idx* (plus one page)."""
+        if not self._ranked_sorted and idx + self.MAX_VISIBLE >= len(self.filtered):
+            self._sort_all()
+
+    def _match_positions(self, item_idx: int) -> set:
+        positions = self._highlight_cache.get(item_idx)
+        if positions is None:
+            positions = self._matcher.highlight(item_idx, FuzzyMatcher.parts(self.filter_text))
+            self._highlight_cache[item_idx] = positions
         return positions
 
     def selected_word(self) -> Optional[str]:
@@ -1228,6 +1819,7 @@ class SelectPopup:
                 self.scroll_offset = self.selected_idx
 
     def _nav_down(self):
+        self._ensure_ranked(self.selected_idx + 1)
         if self.selected_idx < len(self.filtered) - 1:
             self.selected_idx += 1
             if self.selected_idx >= self.scroll_offset + self.MAX_VISIBLE:
@@ -1240,6 +1832,7 @@ class SelectPopup:
             self.scroll_offset = self.selected_idx
 
     def _nav_page_down(self):
+        self._ensure_ranked(self.selected_idx + self.MAX_VISIBLE)
         last = len(self.filtered) - 1
         self.selected_idx = min(last, self.selected_idx + self.MAX_VISIBLE)
         if self.selected_idx >= self.scroll_offset + self.MAX_VISIBLE:
@@ -1250,6 +1843,7 @@ class SelectPopup:
         self.scroll_offset = 0
 
     def _nav_end(self):
+        self._sort_all()
         self.selected_idx = len(self.filtered) - 1
         self.scroll_offset = max(0, self.selected_idx - self.MAX_VISIBLE + 1)
 
@@ -1384,7 +1978,7 @@ class SelectPopup:
                 is_sel = abs_i == self.selected_idx
                 prefix = '> ' if is_sel else '  '
                 base_attr = sa if is_sel else ia
-                match_pos = self._match_positions(item.label)
+                match_pos = self._match_positions(self._filtered_idx[abs_i])
                 astr(row_y, px + 1, prefix, base_attr)
                 avail = pw - 2 - len(prefix)
                 truncated = item.label[:avail]
@@ -1399,7 +1993,7 @@ class SelectPopup:
             ach(row_y, px + pw - 1, ACS_VL, ba)
 
         # Scroll indicator row
-        indicator = f'[{self.selected_idx + 1}/{total}]' if total > 0 else '[0/0]'
+        indicator = f'[{self.selected_idx + 1}/{self.total}]' if total > 0 else '[0/0]'
         ind_row = py + 3 + self.MAX_VISIBLE
         ach (ind_row, px,                            ACS_VL, ba)
         astr(ind_row, px + 1,                        ' ' * (pw - 2), ia)
@@ -2062,8 +2656,8 @@ class Renderer:
         self.scroll_col = 0
         self._height = 0
         self._width = 0
-        self.search_matches: List[Tuple[int, int, int]] = []
-        self.search_current = -1
+        self.search_rows: dict = {}  # row -> [(col_start, col_end), ...]
+        self.search_current: Optional[Tuple[int, int, int]] = None
         self.debug_text = ''
         self.status_name: Optional[str] = None
         self.status_notification: Optional[str] = None
@@ -2168,7 +2762,7 @@ class Renderer:
             pass
         # Position physical cursor
         if search and search.active:
-            prompt = ' Search: '
+            prompt = search_prompt(search)
             cx = min(len(prompt) + len(search.query), self._width - 1)
             cy = self._height - 2
             try:
@@ -2219,17 +2813,6 @@ class Renderer:
         colors = self.colors
         text_rows = self.text_rows
 
-        # Build set of search match positions for quick lookup
-        match_set = set()
-        for (mr, mcs, mce) in self.search_matches:
-            for c in range(mcs, mce):
-                match_set.add((mr, c))
-        current_match_set = set()
-        if 0 <= self.search_current < len(self.search_matches):
-            mr, mcs, mce = self.search_matches[self.search_current]
-            for c in range(mcs, mce):
-                current_match_set.add((mr, c))
-
         gutter_str = '~    '[:self.GUTTER]
         if self.wrap:
             tc = self.text_cols
@@ -2246,8 +2829,7 @@ class Renderer:
                 for vrow in range(num_vrows):
                     if screen_y >= text_rows:
                         break
-                    self._draw_visual_line(screen_y, line_idx, vrow * tc,
-                                           vrow == 0, match_set, current_match_set)
+                    self._draw_visual_line(screen_y, line_idx, vrow * tc, vrow == 0)
                     screen_y += 1
                 line_idx += 1
         else:
@@ -2256,13 +2838,14 @@ class Renderer:
                 if line_idx >= len(buf.lines):
                     self._safe_addstr(y, 0, gutter_str, curses.color_pair(colors.line_num))
                     continue
-                self._draw_visual_line(y, line_idx, self.scroll_col,
-                                       True, match_set, current_match_set)
+                self._draw_visual_line(y, line_idx, self.scroll_col, True)
 
-    def _draw_visual_line(self, y: int, line_idx: int, col_start: int, show_lineno: bool,
-                          match_set: set, current_match_set: set):
+    def _draw_visual_line(self, y: int, line_idx: int, col_start: int, show_lineno: bool):
         buf = self.buf
         colors = self.colors
+        row_matches = self.search_rows.get(line_idx, ())
+        current = self.search_current
+        cur_cs, cur_ce = (current[1], current[2]) if current and current[0] == line_idx else (-1, -1)
 
         # Gutter
         if show_lineno:
@@ -2329,7 +2912,7 @@ class Renderer:
 
             in_sel_start = buf.is_in_selection(line_idx, vis_s)
             in_sel_end   = buf.is_in_selection(line_idx, vis_e - 1)
-            has_match    = any((line_idx, c) in match_set for c in range(vis_s, vis_e))
+            has_match    = any(mcs < vis_e and mce > vis_s for mcs, mce in row_matches)
 
             # Fast path is only valid when the selection doesn't start AND end
             # strictly inside the segment (which would make both endpoints appear
@@ -2355,9 +2938,9 @@ class Renderer:
                 for i, ch in enumerate(segment):
                     col = vis_s + i
                     sx  = screen_x + i
-                    if (line_idx, col) in current_match_set:
+                    if cur_cs <= col < cur_ce:
                         attr = curses.color_pair(colors.search_match_current)
-                    elif (line_idx, col) in match_set:
+                    elif any(mcs <= col < mce for mcs, mce in row_matches):
                         attr = curses.color_pair(colors.search_match)
                     elif buf.is_in_selection(line_idx, col):
                         attr = curses.color_pair(colors.sel_pair_for(pair_id))
@@ -2373,9 +2956,15 @@ class Renderer:
         y = self._height - 2
         W = self._width
         colors = self.colors
-        total = len(search.matches)
-        count_str = f' [{search.current_idx + 1}/{total}]' if total > 0 else ' [0]'
-        prompt = ' Search: '
+        total = search.total
+        more = '+' if search.engine.scanning else ''
+        if search.engine.error:
+            count_str = ' [invalid regex]'
+        elif total > 0:
+            count_str = f' [{search.current_index() + 1}/{total}{more}]'
+        else:
+            count_str = f' [0{more}]'
+        prompt = search_prompt(search)
         bar = f'{prompt}{search.query}{count_str}'
         bar = bar[:W]
         bar = bar.ljust(W)
@@ -2487,6 +3076,7 @@ class Editor:
         self.colors = ColorManager()
         self.buf = TextBuffer()
         self.lexer = Lexer()
+        self.highlighter = HighlightWorker(self.lexer, self.buf)
         self.clipboard = Clipboard()
         self.search = SearchBar()
         self.popup = SelectPopup()
@@ -2756,6 +3346,13 @@ class Editor:
         add(Fn.COMMAND_PALETTE, key_alt(ord('p')))   # Alt+P
 
     def run(self):
+        self.highlighter.start()
+        try:
+            self._run_loop()
+        finally:
+            self.highlighter.stop()
+
+    def _run_loop(self):
         while self.running:
             if DEBUG_PARAMS.get('LOCK'):
                 while DEBUG_PARAMS.get('LOCK') and DEBUG_PARAMS.get('LOCK').locked():
@@ -2774,14 +3371,23 @@ class Editor:
                     # Prefix timeout — dispatch the trigger key itself normally
                     self._prefix_pending = False
                     self.stdscr.timeout(50)
+                    buf, version = self.buf, self.buf.version
                     self._dispatch(key_base(KEY_PREFIX_TRIGGER))
-                    self.lexer.invalidate(self.buf.cursor_row)
+                    if self.buf is not buf or self.buf.version != version:
+                        self.lexer.invalidate(self.buf.cursor_row)
                 else:
                     self._dispatch_pre_hook(-1)
             else:
+                buf, version = self.buf, self.buf.version
+                row_before = self.buf.cursor_row
                 self._dispatch(key)
-                # Invalidate lexer cache from cursor row
-                self.lexer.invalidate(self.buf.cursor_row)
+                # Invalidate lexer cache from the first row the key could have
+                # touched; cursor moves and other keys that leave the text as it
+                # was keep the checkpoints
+                if self.buf is not buf or self.buf.version != version:
+                    self.lexer.invalidate(min(row_before, self.buf.cursor_row))
+
+            self.clipboard.poll()
 
             if self.running_popup.active and self.running_popup.is_done():
                 cb = self._running_done_cb
@@ -2796,8 +3402,12 @@ class Editor:
                 self._check_external_file_change()
 
             self.renderer.ensure_cursor_visible()
-            self.renderer.search_matches = self.search.matches
-            self.renderer.search_current = self.search.current_idx
+            self.search.viewport = (self.renderer.scroll_row,
+                                    self.renderer.scroll_row + self.renderer.text_rows)
+            if self.search.engine.scanning:
+                self.search.step(self.buf)
+            self.renderer.search_rows = self.search.rows
+            self.renderer.search_current = self.search.current
             self.on_before_draw()
             self.renderer.draw(
                 popup=self.popup if self.popup.active else None,
@@ -3096,9 +3706,16 @@ class Editor:
             self.buf.delete_selection()
 
     def _cmd_paste(self):
-        text = self.clipboard.paste()
+        self.clipboard.paste(self._paste_text)
+
+    def _paste_text(self, text: Optional[str]):
         if text is not None:
+            # insert_text replaces the selection first, which may start above the cursor
+            row = self.buf.cursor_row
+            if self.buf.has_selection():
+                row = min(row, self.buf._norm_sel()[0][0])
             self.buf.insert_text(text)
+            self.lexer.invalidate(row)
 
     def _cmd_undo(self):
         self.buf.undo()
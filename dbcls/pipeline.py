@@ -115,6 +115,7 @@ import time
 import json
 import asyncio
 import re
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime, timedelta, date
 from typing import Any, List, Optional, Protocol, Union
@@ -521,7 +522,7 @@ def sql_in_list(data: Any) -> str:
         raise ValueError('sql_in_list: empty input is not allowed')
     items: List[Any]
     if isinstance(data, (list, tuple)):
-        if data and isinstance(data[0], dict):
+        if data and isinstance(data[0], Mapping):
             items = [next(iter(row.values())) for row in data]
         else:
             items = list(data)
@@ -605,12 +606,12 @@ def render_template(template: str, row: dict = None, data: Optional[list] = None
         render_template("SELECT * FROM t WHERE id IN {{sql_in_list(data)}}", data=[1, 2])
         # → "SELECT * FROM t WHERE id IN (1,2)"
     """
-    row = row or {}
+    row = _plain_row(row) if row else {}
     context: dict = {
         **_row_overlay(row),
         **DEFAULT_CONTEXT,
         'row': row,                                      # full row, always
-        'data': data if data is not None else [],
+        'data': _plain_rows(data),
         'sql_in_list': sql_in_list,
     }
     return _render(template, context)
@@ -620,12 +621,12 @@ def normalize_to_dicts(value: Any) -> List[dict]:
     """Convert *value* to a list of dicts suitable for display / chaining."""
     if value is None:
         return []
-    if isinstance(value, dict):
+    if isinstance(value, Mapping):
         return [value]
     if isinstance(value, (list, tuple)):
         if not value:
             return []
-        if isinstance(value[0], dict):
+        if isinstance(value[0], Mapping):
             return list(value)
         # List of scalars → wrap each in {'value': …}
         return [{'value': item} for item in value]
@@ -646,6 +647,18 @@ def _as_rows(data: Any) -> List[dict]:
     return [] if data is NO_DATA else (data or [])
 
 
+def _plain_row(row: Any) -> Any:
+    """*row* as a real dict if it is a client row view, else unchanged."""
+    return row if isinstance(row, dict) or not isinstance(row, Mapping) else dict(row)
+
+
+def _plain_rows(data: Any) -> List[Any]:
+    """Copy of the row list with client row views turned into real dicts, so
+    user Python and templates can mutate, ``json.dumps`` or
+    ``isinstance(row, dict)`` them."""
+    return [_plain_row(row) for row in data or []]
+
+
 # ── Pipeline parser ───────────────────────────────────────────────────────────
 
 @dataclass
@@ -1133,7 +1146,7 @@ class PipelineExecutor:
         value = self._eval_user_code(code, data)
         if value is None:
             return []
-        if isinstance(value, (str, bytes, dict)):
+        if isinstance(value, (str, bytes, Mapping)):
             return [value]
         try:
             return list(value)
@@ -1186,7 +1199,11 @@ class PipelineExecutor:
     # ── Template helpers (methods so they can access self.host.vars) ─────────
 
     def _render_template(self, template: str, row: dict = None, data: Optional[list] = None) -> str:
+        """*data* must already have gone through ``_plain_rows`` (once per
+        step, not per rendered row); *row* is converted here."""
         overlay_row = row if row is not None else (data[0] if data else None)
+        if overlay_row:
+            overlay_row = _plain_row(overlay_row)
         context: dict = {
             **_row_overlay(overlay_row),     # _0/_1/named from current row (or data[0])
             **self._loop_vars(),             # _i — current .FOR item
@@ -1206,7 +1223,7 @@ class PipelineExecutor:
         if not args:
             raise ValueError('.RUN requires a SQL argument')
 
-        sql = self._render_template(args[0], data=data)
+        sql = self._render_template(args[0], data=_plain_rows(data))
 
         result = await self.client.execute(sql)
         return (result.data or []) if result else []
@@ -1219,7 +1236,7 @@ class PipelineExecutor:
         if not args:
             raise ValueError('.URUN requires a SQL argument')
 
-        sql = self._render_template(args[0], data=data)
+        sql = self._render_template(args[0], data=_plain_rows(data))
 
         result = await self.client.execute(sql)
         new_rows = (result.data or []) if result else []
@@ -1236,9 +1253,10 @@ class PipelineExecutor:
         except re.error as exc:
             raise ValueError(f'.RFILTER invalid regex {pattern_str!r}: {exc}') from exc
 
+        rows = _plain_rows(data)
         return [
-            row for row in (data or [])
-            if pattern.search(self._render_template(template, row, data))
+            row for row in rows
+            if pattern.search(self._render_template(template, row, rows))
         ]
 
     async def _cmd_rget(
@@ -1253,8 +1271,9 @@ class PipelineExecutor:
             raise ValueError(f'.RGET invalid regex {pattern_str!r}: {exc}') from exc
 
         result: List[dict] = []
-        for row in (data or []):
-            m = pattern.search(self._render_template(template, row, data))
+        rows = _plain_rows(data)
+        for row in rows:
+            m = pattern.search(self._render_template(template, row, rows))
             if m:
                 groups = m.groups()
                 if groups:
@@ -1271,8 +1290,9 @@ class PipelineExecutor:
             raise ValueError('.FOR_RUN requires a SQL template argument')
         sql_template = args[0]
         result: List[dict] = []
-        for row in (data or []):
-            sql = self._render_template(sql_template, row, data)
+        rows = _plain_rows(data)
+        for row in rows:
+            sql = self._render_template(sql_template, row, rows)
             res = await self.client.execute(sql)
             if res and res.data:
                 result.extend(res.data)
@@ -1357,7 +1377,7 @@ class PipelineExecutor:
         whatever the code produced (the last ``result(...)`` or the passthrough
         data) so the ``.FOR`` loop (br) or the executor (stop) can return it.
         """
-        data_list = list(data or [])
+        data_list = _plain_rows(data)
 
         _called: list = []
 
@@ -1417,7 +1437,7 @@ class PipelineExecutor:
         if len(args) >= 2:
             self.host.vars[key] = self._eval_user_code(args[1], data)
         elif data:
-            self.host.vars[key] = data
+            self.host.vars[key] = _plain_rows(data)
         else:
             self.host.vars.pop(key, None)
         return list(data or [])
@@ -1454,7 +1474,7 @@ class PipelineExecutor:
         if not args:
             raise ValueError('.SHEET requires a NAME argument')
         rows = list(data or [])
-        name = self._render_template(args[0], data=rows)
+        name = self._render_template(args[0], data=_plain_rows(rows))
         self.host.add_pipeline_sheet(name, rows)
         return rows
 
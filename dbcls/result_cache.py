@@ -0,0 +1,148 @@
+"""
+Client-side cache of query results for repeat executions in the editor.
+
+Only read statements (SELECT / SHOW / DESCRIBE) are cached, and not those
+that read the clock, random generators, sequences, locks or live server
+state.  Entries are keyed by engine, database and the SQL text with
+whitespace and ``--`` comments normalised away; they expire after a TTL and
+are evicted in LRU order once the estimated size of all cached results
+passes the memory budget.
+"""
+
+import re
+from collections import OrderedDict
+from time import time
+from typing import Optional
+
+from .clients.base import ClientClass, Result
+
+_TOKEN_RE = re.compile(
+    r"""'(?:[^'\\]|\\.|'')*'?"""        # 'string' (backslash or doubled quote escapes)
+    r'''|"(?:[^"\\]|\\.|"")*"?'''        # "identifier" / MySQL string
+    r'|`[^`]*`?'                         # `identifier`
+    r'|--[^\n]*'                         # line comment
+    r'|/\*.*?(?:\*/|$)'                  # block comment (kept: may be an optimizer hint)
+    r'|\s+'
+    r'|[^\'"`\s/-]+|.',
+    re.DOTALL,
+)
+
+# Also the read-only statements; EXPLAIN (ANALYZE) and WITH may wrap a write
+_CACHEABLE_RE = re.compile(r'\(*\s*(SELECT|SHOW|DESCRIBE|DESC)\b', re.IGNORECASE)
+
+# Statements that write or lock despite starting with SELECT
+_WRITES_RE = re.compile(
+    r'\bINTO\b|\bFOR\s+(?:NO\s+KEY\s+)?UPDATE\b|\bFOR\s+(?:KEY\s+)?SHARE\b|\bLOCK\s+IN\s+SHARE\s+MODE\b',
+    re.IGNORECASE,
+)
+
+# Functions, clock keywords and live server state whose value differs between
+# two runs of the same text
+_VOLATILE_RE = re.compile(
+    r'\b(?:current_date|current_time|current_timestamp|localtime|localtimestamp|'
+    r'utc_date|utc_time|utc_timestamp)\b'
+    r'|\b(?:now|now64|sysdate|curdate|curtime|unix_timestamp|today|yesterday|'
+    r'timeofday|clock_timestamp|statement_timestamp|transaction_timestamp|'
+    r'rand|rand64|random|randomstring|randcanonical|uuid|uuid_short|newid|'
+    r'gen_random_uuid|uuid_generate_v1|uuid_generate_v4|generateuuidv4|'
+    r'nextval|setval|currval|lastval|last_insert_id|found_rows|row_count|connection_id|'
+    r'sleep|pg_sleep|get_lock|release_lock|pg_advisory_lock|pg_try_advisory_lock)\s*\('
+    r'|\b(?:pg_stat_\w+|pg_locks|performance_schema\.\w+|information_schema\.processlist|'
+    r'system\.(?:processes|metrics|events|asynchronous_metrics|query_log|mutations|merges))\b'
+    r'|^\(*\s*SHOW\b.*\b(?:PROCESSLIST|STATUS|ENGINE|MASTER|SLAVE|REPLICA|BINLOG)\b',
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> tuple:
+    """Return (normalised text, text outside quotes and comments).
+
+    Runs of whitespace become one space, ``--`` comments are dropped and a
+    trailing ``;`` is removed; quoted text is kept verbatim."""
+    text, code = [], []
+    for match in _TOKEN_RE.finditer(sql):
+        token = match.group()
+        first = token[0]
+        if first.isspace() or token.startswith('--'):
+            if text and text[-1] != ' ':
+                text.append(' ')
+                code.append(' ')
+            continue
+        text.append(token)
+        code.append(' ' if first in '\'"`' or token.startswith('/*') else token)
+    normalized = ''.join(text).strip()
+    while normalized.endswith(';'):
+        normalized = normalized[:-1].rstrip()
+    return normalized, ''.join(code).strip().rstrip(';')
+
+
+def is_cacheable(sql: str) -> bool:
+    """Whether *sql* is a deterministic read whose result can be reused."""
+    _normalized, code = normalize_sql(sql)
+    return bool(
+        _CACHEABLE_RE.match(code)
+        and ';' not in code
+        and not _WRITES_RE.search(code)
+        and not _VOLATILE_RE.search(code)
+    )
+
+
+def is_read_only(sql: str) -> bool:
+    """Whether *sql* leaves the data as it was (running anything else drops the cache)."""
+    _normalized, code = normalize_sql(sql)
+    return bool(_CACHEABLE_RE.match(code) and ';' not in code and not _WRITES_RE.search(code))
+
+
+class ResultCache:
+    """Results of recent read queries, bounded by age and estimated size."""
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, ttl: float, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        # key -> (result, size, stored at)
+        self._entries: OrderedDict = OrderedDict()
+
+    def key(self, client: ClientClass, sql: str) -> Optional[tuple]:
+        """Cache key for running *sql* on *client*, or None if it must not be cached."""
+        if not is_cacheable(sql):
+            return None
+        return client.ENGINE, client.get_title(), client.dbname, normalize_sql(sql)[0]
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        """Return (copy of the result, age in seconds), or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, _size, stored = entry
+        age = time() - stored
+        if age > self.ttl:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return result.copy(), age
+
+    def put(self, key: tuple, result: Result) -> None:
+        """Store *result*; the caller must hand out copies, never *result* itself."""
+        if key in self._entries:
+            self._drop(key)
+        size = result.memory_size()
+        if result.has_more or size > self.max_bytes:
+            return
+        self._entries[key] = (result, size, time())
+        self.size += size
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _drop(self, key: tuple) -> None:
+        _result, size, _stored = self._entries.pop(key)
+        self.size -= size
+
+    def __len__(self):
+        return len(self._entries)
@@ -10,7 +10,7 @@ from .vd_plotter import Plot
 from .vf_funcs import (
     make_formated_table, reference, escape_sql_value, save_sql,
     ts_to_dt_utc, dt_to_start_of_inteval, ts_to_start_of_inteval,
-    save_rows_to_vars,
+    save_rows_to_vars, load_rows_to_db,
 )
 from .vd_utils import SheetWithReference, ExpandVert
 from . import vd_lock  # noqa: F401 — installs the getkeystroke lock wrapper on import
@@ -27,6 +27,7 @@ TableSheet.addCommand('z'+ENTER, 'open-cell', 'vd.push(openCellAltered(sheet, cu
 
 TableSheet.addCommand('gT', 'save-to-vars', 'save_rows_to_vars(sheet, selectedRows or [cursorRow])', 'Save selected rows (or current row) to _vars under a prompted name')
 TableSheet.addCommand('gzT', 'save-col-to-vars', 'save_col_values_to_vars(sheet, cursorCol, selectedRows or [cursorRow])', 'Save selected values of current column (or current cell) to _vars as a flat list')
+TableSheet.addCommand('gW', 'load-to-db', 'load_rows_to_db(sheet, selectedRows or rows)', 'Bulk-insert selected rows (or all rows) into a table of the connected database')
 
 # Alt + arrow keys to move cursor faster
 TableSheet.addCommand('Alt+b', 'go-left-3', 'cursorRight(-3)')
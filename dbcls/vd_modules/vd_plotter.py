@@ -4,7 +4,7 @@ import plotext as plt
 from datetime import datetime, date
 from collections import defaultdict
 
-from visidata import VisiData, BaseSheet
+from visidata import VisiData, BaseSheet, Column
 from visidata.color import colors as _vd_colors, rgb_to_xterm256 as _rgb_to_xterm256
 
 
@@ -20,61 +20,152 @@ def to_dt_str(val):
     return str(val)
 
 
-def _draw_ansi(scr, ansi_str, start_row=0, start_col=0):
-    max_y, max_x = scr.getmaxyx()
+# For some reason visidata unable to render "─" symbol
+_BOX_TO_ASCII = str.maketrans({'─': '-', '┌': '+', '┐': '+', '└': '+', '┘': '+',
+                               '┬': '+', '┴': '+', '├': '+', '┤': '+'})
+
+
+def _apply_sgr(codes_str, fg, bg, extra):
+    """Return the (fg, bg, extra) state after one SGR escape sequence."""
+    if not codes_str or codes_str == '0':
+        return -1, -1, _curses.A_NORMAL
+    try:
+        codes = [int(p) for p in codes_str.split(';') if p]
+    except ValueError:
+        codes = []
+    i = 0
+    while i < len(codes):
+        c = codes[i]
+        if c == 0:
+            fg, bg = -1, -1
+            extra = _curses.A_NORMAL
+        elif c == 1:
+            extra |= _curses.A_BOLD
+        elif c == 3:
+            extra |= _curses.A_ITALIC
+        elif c == 38 and i + 2 < len(codes) and codes[i+1] == 5:
+            fg = codes[i+2]; i += 2
+        elif c == 48 and i + 2 < len(codes) and codes[i+1] == 5:
+            bg = codes[i+2]; i += 2
+        elif c == 38 and i + 4 < len(codes) and codes[i+1] == 2:
+            fg = _rgb_to_xterm256(codes[i+2], codes[i+3], codes[i+4]); i += 4
+        elif c == 48 and i + 4 < len(codes) and codes[i+1] == 2:
+            bg = _rgb_to_xterm256(codes[i+2], codes[i+3], codes[i+4]); i += 4
+        i += 1
+    return fg, bg, extra
+
+
+def _parse_ansi(ansi_str, start_row=0, start_col=0):
+    """Split ANSI text into (row, col, text, fg, bg, extra) runs.
+
+    Adjacent characters on the same line with the same attributes form
+    one run, so drawing takes one addstr per run instead of per character.
+    """
+    runs = []  # [row, col, pieces, state]
     row, col = start_row, start_col
-    cur_fg, cur_bg = -1, -1
-    cur_extra = _curses.A_NORMAL
-    cur_attr = _vd_colors._get_colorpair(cur_fg, cur_bg, '') | cur_extra
-    pos = 0
+    state = (-1, -1, _curses.A_NORMAL)
 
-    def render_text(text):
-        nonlocal row, col, cur_attr
-        for ch in text:
-            if ch == '\n':
+    def add_text(text):
+        nonlocal row, col
+        for n, line in enumerate(text.split('\n')):
+            if n:
                 row += 1
                 col = start_col
-            elif row < max_y and col < max_x:
-                try:
-                    scr.addstr(row, col, ch, cur_attr)
-                except _curses.error:
-                    pass
-                col += 1
+            if not line:
+                continue
+            last = runs[-1] if runs else None
+            if last and last[0] == row and last[3] == state:
+                last[2].append(line)
+            else:
+                runs.append([row, col, [line], state])
+            col += len(line)
 
+    pos = 0
     for match in _ANSI_RE.finditer(ansi_str):
-        render_text(ansi_str[pos:match.start()])
-        codes_str = match.group(1)
-        if not codes_str or codes_str == '0':
-            cur_fg, cur_bg = -1, -1
-            cur_extra = _curses.A_NORMAL
-        else:
-            try:
-                codes = [int(p) for p in codes_str.split(';') if p]
-            except ValueError:
-                codes = []
-            i = 0
-            while i < len(codes):
-                c = codes[i]
-                if c == 0:
-                    cur_fg, cur_bg = -1, -1
-                    cur_extra = _curses.A_NORMAL
-                elif c == 1:
-                    cur_extra |= _curses.A_BOLD
-                elif c == 3:
-                    cur_extra |= _curses.A_ITALIC
-                elif c == 38 and i + 2 < len(codes) and codes[i+1] == 5:
-                    cur_fg = codes[i+2]; i += 2
-                elif c == 48 and i + 2 < len(codes) and codes[i+1] == 5:
-                    cur_bg = codes[i+2]; i += 2
-                elif c == 38 and i + 4 < len(codes) and codes[i+1] == 2:
-                    cur_fg = _rgb_to_xterm256(codes[i+2], codes[i+3], codes[i+4]); i += 4
-                elif c == 48 and i + 4 < len(codes) and codes[i+1] == 2:
-                    cur_bg = _rgb_to_xterm256(codes[i+2], codes[i+3], codes[i+4]); i += 4
-                i += 1
-        cur_attr = _vd_colors._get_colorpair(cur_fg, cur_bg, '') | cur_extra
+        add_text(ansi_str[pos:match.start()])
+        state = _apply_sgr(match.group(1), *state)
         pos = match.end()
+    add_text(ansi_str[pos:])
+
+    return [(row, col, ''.join(pieces), *state) for row, col, pieces, state in runs]
+
+
+def _draw_runs(scr, runs):
+    max_y, max_x = scr.getmaxyx()
+    # color pairs may be reset by visidata between frames, so only cache per draw
+    pairs = {}
+    for row, col, text, fg, bg, extra in runs:
+        if row >= max_y or col >= max_x:
+            continue
+        pair = pairs.get((fg, bg))
+        if pair is None:
+            pair = pairs[(fg, bg)] = _vd_colors._get_colorpair(fg, bg, '')
+        try:
+            scr.addstr(row, col, text[:max_x - col], pair | extra)
+        except _curses.error:
+            pass
+
+
+def _draw_ansi(scr, ansi_str, start_row=0, start_col=0):
+    _draw_runs(scr, _parse_ansi(ansi_str, start_row, start_col))
+
+
+def _x_value(val):
+    """Numeric position of an x value, for bucketing by time."""
+    if isinstance(val, datetime):
+        return val.timestamp()
+    if isinstance(val, date):
+        return float(val.toordinal() * 86400)
+    return float(val)
+
+
+def downsample(points: list, columns: int) -> list:
+    """Keep the first, last, min and max point of every pixel column.
+
+    *points* must be sorted by x.  Spikes survive and the result has at
+    most 4 * *columns* points, so plotting time no longer grows with the
+    number of rows.  Points that cannot be compared are returned as is.
+    """
+    if columns <= 0 or len(points) <= 4 * columns:
+        return points
+    try:
+        x0 = _x_value(points[0][0])
+        span = _x_value(points[-1][0]) - x0
+        if span <= 0:
+            return points
+        scale = (columns - 1) / span
+
+        keep = []
+        current = None
+        first = low = high = last = 0
+        for i, (x, y) in enumerate(points):
+            column = int((_x_value(x) - x0) * scale)
+            if column != current:
+                if current is not None:
+                    keep.extend(sorted({first, low, high, last}))
+                current = column
+                first = low = high = i
+            elif y < points[low][1]:
+                low = i
+            elif y > points[high][1]:
+                high = i
+            last = i
+        keep.extend(sorted({first, low, high, last}))
+    except (TypeError, ValueError, OverflowError):
+        return points
+    return [points[i] for i in keep]
+
 
-    render_text(ansi_str[pos:])
+# Every cell edit (commands, undo, API calls) ends in Column.setValue; count
+# them per sheet so a plot notices changed values.  Guard against re-wrapping.
+if not getattr(Column, '_dbcls_edit_count_wrapped', False):
+    Column._dbcls_edit_count_wrapped = True
+
+    @Column.after
+    def setValue(col, row, val, setModified=True):
+        sheet = col.sheet
+        if sheet is not None:
+            sheet.__dict__['_cell_edits'] = sheet.__dict__.get('_cell_edits', 0) + 1
 
 
 @VisiData.api
@@ -84,6 +175,9 @@ class Plot(BaseSheet):
         super().__init__(*names, **kwargs)
         self._hidden_buckets = set()
         self.src = None
+        # (stamp, series) and (key, chart) — see _series() and _chart()
+        self._series_cache = None
+        self._chart_cache = None
 
         cols = self.source_sheet.keyCols
 
@@ -98,63 +192,91 @@ class Plot(BaseSheet):
         window_height, window_width = scr.getmaxyx()
         self.draw_plot(scr, window_height, window_width)
 
+    def reload(self):
+        self._series_cache = None
+        self._chart_cache = None
+
     def toggle_bucket(self, bucket: int):
         if bucket in self._hidden_buckets:
             self._hidden_buckets.remove(bucket)
         else:
             self._hidden_buckets.add(bucket)
 
-    def draw_plot(self, scr, window_height, window_width):
-        cols = self.source_sheet.keyCols
+    def _source_stamp(self) -> tuple:
+        """Changes whenever the plotted rows may have: reload, added or
+        removed rows, cell edits, selection, key columns and their types."""
+        src = self.source_sheet
+        selected = src._selectedRows
+        return (
+            id(src.rows), len(src.rows), src.__dict__.get('_cell_edits', 0),
+            len(selected), sum(map(hash, selected)),
+            tuple((id(c), c.type) for c in src.keyCols),
+        )
 
-        plt.clear_figure()
-        plt.date_form('Y-m-d H:M:S')
-        plt.theme('clear')
+    def _series(self) -> tuple:
+        """(bucketed, [(bucket, points sorted by x)]), extracted once per
+        source stamp."""
+        stamp = self._source_stamp()
+        if self._series_cache is not None and self._series_cache[0] == stamp:
+            return self._series_cache[1]
 
+        cols = self.source_sheet.keyCols
         src = self.source_sheet
         rows = src.selectedRows if src._selectedRows else src.rows
 
         if len(cols) >= 3:
             dt_col, bucket_col, val_col = cols[0], cols[1], cols[2]
             buckets = defaultdict(list)
-
             for row in rows:
                 dt = dt_col.getTypedValue(row)
                 bucket = bucket_col.getTypedValue(row)
                 val = val_col.getTypedValue(row)
                 buckets[bucket].append((dt, val))
+        else:
+            dt_col, val_col = cols[0], cols[1]
+            buckets = {None: [(dt_col.getTypedValue(row), val_col.getTypedValue(row)) for row in rows]}
 
-            for index, (bucket, points) in enumerate(buckets.items()):
-                if index in self._hidden_buckets:
-                    continue
+        series = [(bucket, sorted(points, key=lambda p: p[0])) for bucket, points in buckets.items()]
+        self._series_cache = (stamp, (len(cols) >= 3, series))
+        self._chart_cache = None
+        return self._series_cache[1]
 
-                self.addCommand(f'{index + 1}', f'toggle-bucket-{index + 1}', f'sheet.toggle_bucket({index});', f'Toggle bucket {bucket}')
-                points_sorted = sorted(points, key=lambda p: p[0])
-                dates = [to_dt_str(p[0]) for p in points_sorted]
-                vals = [p[1] for p in points_sorted]
+    def _chart(self, window_height: int, window_width: int) -> list:
+        """Parsed runs of the chart, rebuilt only when the window size, the
+        hidden buckets or the source rows change."""
+        bucketed, series = self._series()
+        key = (window_height, window_width, frozenset(self._hidden_buckets))
+        if self._chart_cache is not None and self._chart_cache[0] == key:
+            return self._chart_cache[1]
 
+        plt.clear_figure()
+        plt.date_form('Y-m-d H:M:S')
+        plt.theme('clear')
+
+        # Braille markers put two points in a terminal column
+        columns = 2 * max(window_width - 1, 1)
+        for index, (bucket, points) in enumerate(series):
+            if index in self._hidden_buckets:
+                continue
+            points = downsample(points, columns)
+            dates = [to_dt_str(p[0]) for p in points]
+            vals = [p[1] for p in points]
+            if bucketed:
                 plt.plot(dates, vals, xside='lower', yside='left', label=f'({index + 1}) {bucket}', color=index + 1)
-        else:
-            dt_col, val_col = cols[0], cols[1]
-            points = []
-            for row in rows:
-                dt = dt_col.getTypedValue(row)
-                val = val_col.getTypedValue(row)
-                points.append((dt, val))
-            points_sorted = sorted(points, key=lambda p: p[0])
-            dates = [to_dt_str(p[0]) for p in points_sorted]
-            vals = [p[1] for p in points_sorted]
-            plt.plot(dates, vals, xside='lower', yside='left')
+            else:
+                plt.plot(dates, vals, xside='lower', yside='left')
 
         plt.plotsize(window_width - 1, window_height - 1)
-        chart_str = plt.build()
+        runs = _parse_ansi(plt.build().translate(_BOX_TO_ASCII))
+        self._chart_cache = (key, runs)
+        return runs
+
+    def draw_plot(self, scr, window_height, window_width):
+        _draw_runs(scr, self._chart(window_height, window_width))
 
-        # For some reason visidata unable to render "─" symbol
-        chart_str = chart_str.replace('─', '-').replace('┌', '+').replace('┐', '+').\
-            replace('└', '+').replace('┘', '+').replace('┬', '+').replace('┴', '+').\
-            replace('├', '+').replace('┤', '+')
-        _draw_ansi(scr, chart_str)
 
+for _index in range(9):
+    Plot.addCommand(f'{_index + 1}', f'toggle-bucket-{_index + 1}', f'sheet.toggle_bucket({_index});', f'Toggle bucket {_index + 1}')
 
 Plot.addCommand(None, 'go-left', '', '')
 Plot.addCommand(None, 'go-right', '', '')
@@ -1,5 +1,5 @@
 from copy import copy, deepcopy
-from typing import List, Tuple, Any
+from typing import List, Optional, Tuple, Any
 
 from visidata import BaseSheet
 from visidata import TableSheet
@@ -7,27 +7,95 @@ from visidata import Progress
 from visidata import asyncthread
 from visidata import ItemColumn
 from visidata import VisiData
+from visidata import Column
 from visidata import ColumnItem
 from visidata import TypedExceptionWrapper
 
 
+class ExpandedRow:
+    """One element of an expanded cell; every other cell is read from *parent*."""
+    __slots__ = ('parent', 'item')
+
+    def __init__(self, parent, item):
+        self.parent = parent
+        self.item = item
+
+
+class ExpandedColumn(Column):
+    """ExpandVert column that reads through to the source row on demand."""
+    def __init__(self, source_col: Column, expanded: bool, **kwargs):
+        super().__init__(source_col.name, **kwargs)
+        self.source_col = source_col
+        self.expanded = expanded
+
+    def calcValue(self, row):
+        if self.expanded:
+            return row.item
+        return self.source_col.getValue(row.parent)
+
+    @property
+    def readonly(self):
+        return False if self.expanded else self.source_col.readonly
+
+    def putValue(self, row, val):
+        if self.expanded:
+            row.item = val
+        else:
+            # Shared with the parent, so every row expanded from it follows
+            self.source_col.setValue(row.parent, val)
+
+
 @VisiData.api
 class ExpandVert(TableSheet):
-    def __init__(self, source, curcol):
-        super().__init__(source.name + "_expver", source=source)
-        self.curcol = curcol
+    """One row per element of the list in *curcol*.
+
+    By default rows are ExpandedRow views: they share the parent row, only
+    the expanded cell differs, and other cells are evaluated when shown.
+    With ``lazy=False`` every row is materialised as a deep copy of the
+    parent's typed values; that mode is API-only (``g+`` always expands
+    lazily).
+    """
+    def __init__(self, source, curcol, lazy: bool = True):
+        super().__init__(source.name + "_expver", source=source, curcol=curcol, lazy=lazy)
 
     def resetCols(self):
         self.columns = []
         for i, col in enumerate(self.source.visibleCols):
-            colcopy = ColumnItem(col.name)
-            colcopy.__setstate__(col.__getstate__())
-            colcopy.expr = i
+            if self.lazy:
+                colcopy = ExpandedColumn(col, expanded=col is self.curcol)
+                state = col.__getstate__()
+                state.pop('expr', None)
+                if col is self.curcol:
+                    state.pop('typestr', None)  # the elements, not the list
+                colcopy.__setstate__(state)
+            else:
+                colcopy = ColumnItem(col.name)
+                colcopy.__setstate__(col.__getstate__())
+                colcopy.expr = i
             self.addColumn(colcopy)
             if col in self.source.keyCols:
                 self.setKeys([colcopy])
 
     def iterload(self):
+        if self.lazy:
+            yield from self._iterload_lazy()
+        else:
+            yield from self._iterload_copies()
+
+    def _iterload_lazy(self):
+        with Progress(gerund='expanding vertically', total=len(self.source.rows)) as prog:
+            for row in self.source.rows:
+                value = self.curcol.getTypedValue(row)
+                if isinstance(value, TypedExceptionWrapper):
+                    value = None
+                if isinstance(value, list):
+                    for item in value:
+                        yield ExpandedRow(row, item)
+                else:
+                    yield ExpandedRow(row, value)
+                prog.addProgress(1)
+
+    def _iterload_copies(self):
         with Progress(gerund='expanding vertically'):
             curcol_idx = None
             for row in self.source.rows:
@@ -65,6 +133,7 @@ def openRefCells(vd, cursorCol, selectedRows):
     fields = None
     source = None
     values_list = []
+    seen = set()
 
     for row in selectedRows:
         cell = cursorCol.getValue(row)
@@ -73,7 +142,14 @@ def openRefCells(vd, cursorCol, selectedRows):
                 fields = cell.fields
                 source = cell.source
 
-            values_list.extend(cell.values_list)
+            for value in cell.values_list:
+                try:
+                    if value in seen:
+                        continue
+                    seen.add(value)
+                except TypeError:  # unhashable keys are kept as they are
+                    pass
+                values_list.append(value)
 
     if not values_list:
         vd.fail('No reference cells found')
@@ -121,20 +197,25 @@ class SheetWithReference(TableSheet):
         )
         self.addColumn(self.ref_col, index=0)
 
+        index = reference_index(self.right_sheet, right_key_col_names)
+
         for row in Progress(self.left_sheet, 'referencing'):
             left_sheet_key_values = tuple(getattr(row, field) for field in left_key_col_names)
 
             self.ref_col.putValue(
                 row.row,
-                reference_sheets(self.right_sheet, right_key_col_names, left_sheet_key_values)
+                reference_sheets(self.right_sheet, right_key_col_names, left_sheet_key_values, index)
             )
 
 
 class ReferenceSheet(TableSheet):
-    def __init__(self, name: str, source: TableSheet, fields: Tuple[str], values: List[Tuple[Any]]):
+    def __init__(self, name: str, source: TableSheet, fields: Tuple[str], values: List[Tuple[Any]],
+                 rows: Optional[List[Any]] = None):
         super().__init__(name, source=source)
         self.fields = fields
         self.values_list = values
+        # Matching source rows when already known from a reference index
+        self.ref_rows = rows
 
     def iterload(self):
         self.columns = []
@@ -147,24 +228,74 @@ class ReferenceSheet(TableSheet):
 
         self.setKeys([c for c in self.columns if c.name in key_col_names])
 
-        for lcr in self.source:
-            right_sheet_key_values = tuple(getattr(lcr, field) for field in self.fields)
-
-            if right_sheet_key_values in self.values_list:
-                yield lcr.row
-
+        # Rows handed over at creation serve the first load; reloads look
+        # the keys up again so they follow changes in the source sheet.
+        rows, self.ref_rows = self.ref_rows, None
+        if rows is None:
+            rows = reference_rows(self.source, self.fields, self.values_list)
+        yield from rows
+
+
+def reference_index(right_sheet: TableSheet, fields: Tuple[str]) -> dict:
+    """Map each key tuple of *right_sheet* to its rows, in sheet order.
+
+    Built in one pass over the current rows and not kept on the sheet: cell
+    edits, added or deleted rows and sorting would leave a stored index
+    stale.  Callers that look up many keys build one and pass it along.
+    """
+    index = {}
+    for lcr in Progress(right_sheet, 'indexing'):
+        key = tuple(getattr(lcr, field) for field in fields)
+        try:
+            rows = index.get(key)
+        except TypeError:  # unhashable key values cannot be referenced
+            continue
+        if rows is None:
+            index[key] = [lcr.row]
+        else:
+            rows.append(lcr.row)
+    return index
+
+
+def reference_rows(sheet: TableSheet, fields: Tuple[str], values: List[Tuple[Any]]) -> list:
+    """Rows of *sheet* whose key is one of *values*, in sheet order."""
+    wanted = set()
+    unhashable = []
+    for value in values:
+        try:
+            wanted.add(value)
+        except TypeError:
+            unhashable.append(value)
+
+    index = reference_index(sheet, fields)
+    if len(wanted) == 1 and not unhashable:
+        return list(index.get(next(iter(wanted)), ()))
+
+    matched = [row for value in wanted for row in index.get(value, ())]
+    if unhashable:
+        matched.extend(
+            lcr.row for lcr in sheet
+            if tuple(getattr(lcr, field) for field in fields) in unhashable
+        )
+    # Rows may leave the sheet while the index is walked (async edits)
+    position = {id(row): pos for pos, row in enumerate(sheet.rows)}
+    matched = [row for row in matched if id(row) in position]
+    matched.sort(key=lambda row: position[id(row)])
+    return matched
 
-def reference_sheets(right_sheet: TableSheet, fields: Tuple[str], values: Tuple[Any]):
-    count = 0
-    for lcr in right_sheet:
-        right_sheet_key_values = tuple(getattr(lcr, field) for field in fields)
 
-        if values == right_sheet_key_values:
-            count += 1
+def reference_sheets(right_sheet: TableSheet, fields: Tuple[str], values: Tuple[Any], index: dict = None):
+    if index is None:
+        index = reference_index(right_sheet, fields)
+    try:
+        rows = index.get(values, [])
+    except TypeError:
+        rows = []
 
     return ReferenceSheet(
-        f'{right_sheet.name}_reference[{count}]',
+        f'{right_sheet.name}_reference[{len(rows)}]',
         source=right_sheet,
         fields=fields,
-        values=[values]
+        values=[values],
+        rows=rows,
     )
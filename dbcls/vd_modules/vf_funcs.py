@@ -1,8 +1,10 @@
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from decimal import Decimal
 from typing import Union
 
 import visidata
-from visidata import VisiData, PyobjSheet, Progress, TypedExceptionWrapper
+from visidata import VisiData, PyobjSheet, Progress, ItemColumn, TypedWrapper, anytype, asyncthread, vd
 
 from ..utils import prettify
 from .vd_utils import reference_sheets
@@ -27,38 +29,165 @@ def reference(_, sheet_name, field, value):
     return reference_sheets(other_sheet, (field,), (value,))
 
 
-def escape_sql_value(value):
+_WRITE_BUFFER_ROWS = 5000
+
+vd.option('sql_insert_batch', 500, 'rows per multi-row INSERT when saving .sql (1 for one statement per row)')
+vd.option('db_load_batch', 1000, 'rows per bulk insert when loading a sheet into the database')
+vd.option('sql_dialect', '', 'quoting dialect for .sql export: mysql, postgres, sqlite3, clickhouse or cassandra (default: engine of the current connection, else mysql)')
+
+
+@dataclass(frozen=True)
+class SqlDialect:
+    """How literals and identifiers are written for one engine"""
+    ident_quote: str
+    # MySQL and ClickHouse read \n, \\ etc. inside string literals
+    backslash_escapes: bool
+    true: str
+    false: str
+    # format string for bytes, filled with their hex representation
+    blob: str
+    multi_row: bool = True
+
+
+SQL_DIALECTS = {
+    'mysql': SqlDialect('`', True, '1', '0', "X'{}'"),
+    'clickhouse': SqlDialect('`', True, 'true', 'false', "unhex('{}')"),
+    'postgres': SqlDialect('"', False, 'TRUE', 'FALSE', "'\\x{}'"),
+    'sqlite3': SqlDialect('"', False, '1', '0', "X'{}'"),
+    # CQL has no multi-row VALUES
+    'cassandra': SqlDialect('"', False, 'true', 'false', '0x{}', multi_row=False),
+}
+
+_ENGINE_DIALECTS = {
+    'MySQL': 'mysql',
+    'Clickhouse': 'clickhouse',
+    'PostgreSQL': 'postgres',
+    'Sqlite3': 'sqlite3',
+    'Cassandra': 'cassandra',
+}
+
+_BACKSLASH_ESCAPES = str.maketrans({
+    # translate() maps every character once, so backslashes added here are not escaped again
+    '\\': '\\\\',
+    "'": "''",
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+    '\0': '\\0',
+})
+
+
+def escape_sql_value(value, dialect: SqlDialect = SQL_DIALECTS['mysql']):
     """Escape a value for SQL INSERT statement"""
     if value is None:
         return 'NULL'
+    elif isinstance(value, str):
+        if dialect.backslash_escapes:
+            return f"'{value.translate(_BACKSLASH_ESCAPES)}'"
+        return "'" + value.replace("'", "''") + "'"
     elif isinstance(value, bool):
         # Handle booleans before numbers since bool is subclass of int
-        return '1' if value else '0'
-    elif isinstance(value, (int, float)):
+        return dialect.true if value else dialect.false
+    elif isinstance(value, float):
+        return 'NULL' if value != value else str(value)
+    elif isinstance(value, (int, Decimal)):
         return str(value)
-    else:
-        # Convert to string and escape special characters
-        escaped = str(value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return dialect.blob.format(bytes(value).hex())
+    return escape_sql_value(str(value), dialect)
 
-        # Escape backslashes first (important to do this before quotes)
-        escaped = escaped.replace('\\', '\\\\')
 
-        # Escape single quotes by doubling them (SQL standard)
-        escaped = escaped.replace("'", "''")
+def quote_sql_name(name: str, dialect: SqlDialect = SQL_DIALECTS['mysql']) -> str:
+    q = dialect.ident_quote
+    return q + str(name).replace(q, q + q) + q
 
-        # Escape other special characters
-        escaped = escaped.replace('\n', '\\n')
-        escaped = escaped.replace('\r', '\\r')
-        escaped = escaped.replace('\t', '\\t')
-        escaped = escaped.replace('\0', '\\0')
 
-        return f"'{escaped}'"
+def sql_dialect(name: str = '') -> SqlDialect:
+    """Dialect by name; with no name, the one of the connected engine"""
+    if not name:
+        try:
+            from visidata import dbeditor
+        except ImportError:
+            dbeditor = None
+        engine = getattr(getattr(dbeditor, 'client', None), 'ENGINE', None)
+        name = _ENGINE_DIALECTS.get(engine, 'mysql')
+    if name not in SQL_DIALECTS:
+        vd.fail(f'unknown sql_dialect {name!r}, expected one of: {", ".join(SQL_DIALECTS)}')
+    return SQL_DIALECTS[name]
+
+
+def _typed_value_getter(col):
+    """Resolve the column's getter and type once, instead of per cell in
+    getTypedValue().  Nulls and errors come back as None."""
+    get_value = col.getValue
+    typ = col.type
+
+    if type(col) is ItemColumn and not col.defer and col._cachedValues is None:
+        # Plain dict/list rows: index directly instead of going through
+        # getValue -> calcValue -> getitemdeep, falling back on any miss
+        key = col.expr
+
+        def get_value(row, slow=get_value):
+            try:
+                return row[key]
+            except Exception:
+                return slow(row)
+
+    def typed_value(row):
+        try:
+            val = get_value(row)
+            if isinstance(val, TypedWrapper):
+                return None
+            if val is not None and typ is not anytype:
+                val = typ(val)
+            return val
+        except Exception:
+            return None
+
+    return typed_value
+
+
+def _sql_value_getter(col, dialect: SqlDialect):
+    typed_value = _typed_value_getter(col)
+    return lambda row: escape_sql_value(typed_value(row), dialect)
+
+
+def iter_sql_inserts(vs, columns, table_name: str, dialect: SqlDialect, batch_size: int):
+    """Yield (statement, nrows) for *vs* rows, *batch_size* rows per INSERT"""
+    if not dialect.multi_row:
+        batch_size = 1
+    batch_size = max(int(batch_size), 1)
+
+    col_names = ', '.join(quote_sql_name(col.name, dialect) for col in columns)
+    head = f'INSERT INTO {quote_sql_name(table_name, dialect)} ({col_names}) VALUES'
+    getters = [_sql_value_getter(col, dialect) for col in columns]
+
+    batch = []
+    for row in vs.rows:
+        batch.append('(' + ', '.join([get(row) for get in getters]) + ')')
+        if len(batch) >= batch_size:
+            yield _insert_statement(head, batch), len(batch)
+            batch = []
+    if batch:
+        yield _insert_statement(head, batch), len(batch)
+
+
+def _insert_statement(head: str, values: list) -> str:
+    if len(values) == 1:
+        return f'{head} {values[0]};\n'
+    return head + '\n' + ',\n'.join(values) + ';\n'
 
 
 @VisiData.api
 def save_sql(vd, p, *vsheets):
-    """Save sheets as SQL INSERT statements"""
+    """Save sheets as SQL INSERT statements
+
+    Rows are grouped into multi-row INSERTs of options.sql_insert_batch,
+    quoted for options.sql_dialect.  Paths ending in .gz/.zst are
+    compressed by visidata's Path.open.
+    """
     for vs in vsheets:
+        dialect = sql_dialect(vs.options.sql_dialect)
         with p.open(mode='w', encoding=vs.options.save_encoding) as fp:
             # Use sheet name as table name, cleaned for SQL
             table_name = vd.cleanName(vs.name) or 'table'
@@ -69,34 +198,128 @@ def save_sql(vd, p, *vsheets):
                 vd.warning(f'No columns to export in sheet {vs.name}')
                 continue
 
-            # Generate column names for INSERT statement
-            col_names = ', '.join(f'`{col.name}`' for col in columns)
-
-            # Iterate through rows with progress indicator
+            # Statements are buffered and written a few thousand rows at a time
+            buffered = []
+            buffered_rows = 0
             with Progress(gerund='saving', total=vs.nRows) as prog:
-                for row in vs.rows:
-                    values = []
-                    for col in columns:
-                        try:
-                            val = col.getTypedValue(row)
-                            if isinstance(val, TypedExceptionWrapper):
-                                # Handle errors in cell values
-                                values.append('NULL')
-                            else:
-                                values.append(escape_sql_value(val))
-                        except Exception:
-                            values.append('NULL')
-
-                    # Build INSERT statement
-                    vals_str = ', '.join(values)
-                    sql = f"INSERT INTO `{table_name}` ({col_names}) VALUES ({vals_str});\n"
-                    fp.write(sql)
-
-                    prog.addProgress(1)
+                for sql, nrows in iter_sql_inserts(vs, columns, table_name, dialect, vs.options.sql_insert_batch):
+                    buffered.append(sql)
+                    buffered_rows += nrows
+                    if buffered_rows >= _WRITE_BUFFER_ROWS:
+                        fp.write(''.join(buffered))
+                        prog.addProgress(buffered_rows)
+                        buffered, buffered_rows = [], 0
+                fp.write(''.join(buffered))
+                prog.addProgress(buffered_rows)
 
             vd.status(f'Saved {vs.nRows} row(s) as SQL INSERT to {p.given}')
 
 
+@VisiData.api
+def load_rows_to_db(vd, sheet, rows):
+    """Prompt for a table and bulk-insert *rows* of *sheet* into it over the
+    editor's connection"""
+    try:
+        from visidata import dbeditor
+    except ImportError:
+        dbeditor = None
+    if getattr(dbeditor, 'client', None) is None:
+        vd.fail('no database connection')
+    columns = sheet.visibleCols
+    if not columns:
+        vd.fail(f'No columns to load in sheet {sheet.name}')
+
+    table = vd.input('load into table: ', 'table', value=vd.cleanName(sheet.name))
+    if not table:
+        return
+
+    from ..dbcls import SyncClient
+    client = SyncClient(dbeditor.asyncloop_thread, dbeditor.client)
+    vd.bulk_load(client, table, sheet, columns, list(rows), dbeditor.invalidate_result_cache)
+
+
+class _LoadStopped(Exception):
+    """The client timed out or was cancelled: the batch in flight may still
+    be written, so retrying it could insert rows twice."""
+    loaded = 0
+
+
+def _insert_batch(client, table: str, names: list, values: list) -> str:
+    """Database error message, or '' if the rows went in"""
+    try:
+        result = client.bulk_insert(table, names, values)
+    except Exception as exc:
+        if not client.is_db_error_exception(exc):
+            raise
+        return str(exc) or type(exc).__name__
+    # SyncClient reports timeouts and cancellation as a message
+    if result.message:
+        raise _LoadStopped(result.message)
+    return ''
+
+
+def _load_batch(client, table: str, names: list, batch: list, errors: list) -> int:
+    """Insert *batch*, halving parts that fail with a database error until
+    the failing rows are found.  Returns the number of rows inserted."""
+    loaded = 0
+    pending = [batch]
+    while pending:
+        part = pending.pop()
+        try:
+            error = _insert_batch(client, table, names, part)
+        except _LoadStopped as stop:
+            stop.loaded = loaded
+            raise
+        if not error:
+            loaded += len(part)
+        elif len(part) == 1:
+            errors.append((error, part[0]))
+        else:
+            middle = len(part) // 2
+            pending += [part[middle:], part[:middle]]
+    return loaded
+
+
+@VisiData.api
+@asyncthread
+def bulk_load(vd, client, table: str, sheet, columns: list, rows: list, on_written=None):
+    """Insert *rows* in batches of options.db_load_batch.  Rows that fail are
+    pushed as a sheet along with their error.  *on_written* is called once
+    the load has ended, whatever got written."""
+    names = [col.name for col in columns]
+    getters = [_typed_value_getter(col) for col in columns]
+    batch_size = max(int(sheet.options.db_load_batch), 1)
+
+    loaded = 0
+    errors = []
+    stopped = None
+    try:
+        with Progress(gerund='loading', total=len(rows)) as prog:
+            for start in range(0, len(rows), batch_size):
+                batch = [tuple(get(row) for get in getters) for row in rows[start:start + batch_size]]
+                try:
+                    loaded += _load_batch(client, table, names, batch, errors)
+                except _LoadStopped as stop:
+                    loaded += stop.loaded
+                    stopped = stop
+                    break
+                prog.addProgress(len(batch))
+    finally:
+        if on_written is not None:
+            on_written()
+
+    if stopped is not None:
+        vd.warning(f'Load into {table} stopped ({stopped}) after {loaded} of {len(rows)} row(s); '
+                   'the batch in flight may have been written')
+    else:
+        vd.status(f'Loaded {loaded} of {len(rows)} row(s) into {table}')
+    if errors:
+        vd.push(PyobjSheet(
+            f'{vd.cleanName(table)}_load_errors',
+            source=[{'load_error': error, **dict(zip(names, values))} for error, values in errors],
+        ))
+
+
 @VisiData.api
 def save_rows_to_vars(vd, sheet, rows):
     from visidata import dbeditor
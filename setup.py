@@ -28,12 +28,13 @@ setup(
     long_description=open('README.md').read(),
     long_description_content_type='text/markdown',
     include_package_data=True,
-    package_data={'dbcls': ['weights.json']},
+    package_data={'dbcls': ['weights.json', 'weights.bin']},
     zip_safe=False,
     platforms='any',
     install_requires=get_requirements(),
     extras_require={
         'cassandra': ['scylla-driver==3.29.9'],
+        'zstd': ['zstandard'],
     },
     python_requires='>=3.9',
     url="https://github.com/Sets88/dbcls",
@@ -2,30 +2,49 @@
 SQL next-word prediction model — training / fine-tuning / inference script.
 
 Imports tokenizer, vocabulary and constants from dbcls.autocomplete.
-Uses the same weights.json format as dbcls/autocomplete.py expects.
+Reads and writes the same weights formats as dbcls/autocomplete.py: the binary
+weights.bin (preferred, memory-mapped at load) and weights.json (fallback).
+The format is picked by the file extension.
+
+Training uses NumPy mini-batches when NumPy is installed and falls back to
+the pure-Python per-sample loop otherwise.  Corpus tokenization runs in a
+process pool and is cached per statement under the dbcls cache directory,
+so re-training on a grown query log only tokenizes the new lines.
 
 Usage:
     python train.py train --corpus data.sql                          # train from scratch
     python train.py train --corpus data.sql --finetune               # fine-tune existing weights
     python train.py train --corpus data.sql --epochs 50 --lr 0.005   # custom hyperparams
     python train.py train --corpus data.sql --finetune --weights custom.json --output custom.json
+    python train.py train --corpus data.sql --trainer python         # original per-sample loop
+    python train.py train --corpus data.sql --batch-size 64 --workers 8
     python train.py infer --sql "SELECT * FROM"                      # run inference
     python train.py infer --sql "SELECT" --top-k 5
+    python train.py convert --weights dbcls/weights.json --output dbcls/weights.bin
 """
 
 import argparse
+import hashlib
 import json
 import math
+import multiprocessing
+import os
 import random
 
 from dbcls.autocomplete import (
     _tokenize_sql,
     _CONTEXT_LENGTH,
-    _WEIGHTS_PATH,
+    _WEIGHTS_BIN_PATH,
     _VOCABULARY,
     _VOCAB_VALUES,
+    _default_cache_path,
+    _default_weights_path,
+    _is_weights_bin,
     _load_weights,
     _predict_next,
+    _read_weights_bin,
+    _write_weights_bin,
+    np,
 )
 
 
@@ -35,6 +54,7 @@ EMBED_DIM     = 5
 HIDDEN_SIZE   = 20
 EPOCHS        = 20
 LEARNING_RATE = 0.01
+BATCH_SIZE    = 32
 
 
 # ── matrix operations ──────────────────────────────────────────────────────────
@@ -167,11 +187,73 @@ def pad_context(indices: list, pad_index: int = 0) -> list:
     return [pad_index] * (_CONTEXT_LENGTH - len(indices)) + indices
 
 
-def make_dataset(corpus: list, token_to_index: dict, vocab_values: set, debug: bool = False) -> list:
+def _token_cache_path(vocab_values: set) -> str:
+    """Per-vocabulary token cache next to the schema cache."""
+    digest = hashlib.sha1('\n'.join(sorted(vocab_values)).encode()).hexdigest()[:16]
+    return os.path.join(os.path.dirname(_default_cache_path()), f'tokens-{digest}.json')
+
+
+def _statement_key(sentence: str) -> str:
+    return hashlib.sha1(sentence.encode()).hexdigest()
+
+
+_worker_vocab = None
+
+
+def _init_worker(vocab_values: set):
+    global _worker_vocab
+    _worker_vocab = vocab_values
+
+
+def _tokenize_worker(sentence: str) -> list:
+    return _tokenize_sql(sentence, _worker_vocab)
+
+
+def tokenize_corpus(corpus: list, vocab_values: set, workers: int = None, cache_path: str = None) -> list:
+    """Tokenize every statement, reusing cached results and spreading the
+    rest over *workers* processes. Returns one token list per statement."""
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as fh:
+                cache = json.load(fh)
+        except (OSError, ValueError):
+            cache = {}
+
+    keys = [_statement_key(sentence) for sentence in corpus]
+    missing = {}
+    for key, sentence in zip(keys, corpus):
+        if key not in cache:
+            missing[key] = sentence
+
+    if missing:
+        todo = list(missing.values())
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(todo) >= 2 * workers:
+            with multiprocessing.Pool(workers, _init_worker, (vocab_values,)) as pool:
+                tokenized = pool.map(_tokenize_worker, todo, chunksize=max(1, len(todo) // (workers * 8)))
+        else:
+            tokenized = [_tokenize_sql(sentence, vocab_values) for sentence in todo]
+        cache.update(zip(missing, tokenized))
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = cache_path + '.tmp'
+                with open(tmp_path, 'w') as fh:
+                    json.dump(cache, fh)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+
+    print(f"Tokenized: {len(missing)} new statements, {len(corpus) - len(missing)} reused")
+    return [cache[key] for key in keys]
+
+
+def make_dataset(corpus: list, token_to_index: dict, vocab_values: set, debug: bool = False,
+                 workers: int = None, cache_path: str = None) -> list:
     pad_index = 0
     training_pairs = []
-    for sentence in corpus:
-        tokenized = _tokenize_sql(sentence, vocab_values)
+    for sentence, tokenized in zip(corpus, tokenize_corpus(corpus, vocab_values, workers, cache_path)):
         if debug:
             print(f"  {sentence}")
             print(f"  → {tokenized}")
@@ -188,6 +270,7 @@ def make_dataset(corpus: list, token_to_index: dict, vocab_values: set, debug: b
 # ── weights I/O ────────────────────────────────────────────────────────────────
 
 def save_weights(model: TrainableModel, token_to_index: dict, index_to_token: dict, path: str):
+    """Write weights as binary when *path* ends in .bin, JSON otherwise."""
     payload = {
         'hyper': {
             'vocab_size':     model.vocab_size,
@@ -207,15 +290,26 @@ def save_weights(model: TrainableModel, token_to_index: dict, index_to_token: di
             'output_bias':      model.output_bias,
         },
     }
-    with open(path, 'w') as fh:
-        json.dump(payload, fh)
+    if path.endswith('.bin'):
+        _write_weights_bin(path, payload['hyper'], payload['vocab'], payload['weights'])
+    else:
+        with open(path, 'w') as fh:
+            json.dump(payload, fh)
     print(f"Weights saved → {path}")
 
 
 def load_for_training(path: str):
-    """Load weights.json into a TrainableModel. Returns (model, token_to_index, index_to_token)."""
-    with open(path) as fh:
-        payload = json.load(fh)
+    """Load weights (binary or JSON) into a TrainableModel. Returns (model, token_to_index, index_to_token)."""
+    if _is_weights_bin(path):
+        hyper, vocab, weights = _read_weights_bin(path)
+        payload = {
+            'hyper': hyper,
+            'vocab': vocab,
+            'weights': {name: list(values) for name, values in weights.items()},
+        }
+    else:
+        with open(path) as fh:
+            payload = json.load(fh)
 
     hyper = payload['hyper']
     token_to_index = payload['vocab']['token_to_index']
@@ -247,9 +341,70 @@ def train_loop(model: TrainableModel, training_data: list, epochs: int, lr: floa
             input_emb, hidden_act, output_probs = model.forward(context_window)
             total_loss -= math.log(max(output_probs[target_idx], 1e-9))
             model.step(context_window, input_emb, hidden_act, output_probs, target_idx, lr)
-        avg_loss = total_loss / len(training_data)
-        ppl = math.exp(min(avg_loss, 20))
-        print(f"  epoch {epoch:>4}/{epochs}  loss={avg_loss:.4f}  ppl={ppl:.2f}")
+        report_epoch(epoch, epochs, total_loss / len(training_data))
+
+
+def report_epoch(epoch: int, epochs: int, avg_loss: float):
+    ppl = math.exp(min(avg_loss, 20))
+    print(f"  epoch {epoch:>4}/{epochs}  loss={avg_loss:.4f}  ppl={ppl:.2f}")
+
+
+def train_loop_numpy(model: TrainableModel, training_data: list, epochs: int, lr: float,
+                     batch_size: int = BATCH_SIZE):
+    """Mini-batch version of train_loop().
+
+    Per-sample gradients are summed over each batch rather than averaged, so
+    *lr* keeps the meaning it has in the per-sample loop.  The weights are
+    written back to *model* as plain lists when training finishes.
+    """
+    V, D, H = model.vocab_size, model.embed_dim, model.hidden_size
+    I = model.input_dim
+
+    embedding = np.asarray(model.embedding_matrix, dtype=np.float64).reshape(V, D)
+    w1 = np.asarray(model.hidden_weights, dtype=np.float64).reshape(H, I)
+    b1 = np.asarray(model.hidden_bias, dtype=np.float64)
+    w2 = np.asarray(model.output_weights, dtype=np.float64).reshape(V, H)
+    b2 = np.asarray(model.output_bias, dtype=np.float64)
+
+    contexts = np.array([context for context, _ in training_data], dtype=np.intp).reshape(-1, _CONTEXT_LENGTH)
+    targets = np.array([target for _, target in training_data], dtype=np.intp)
+    rng = np.random.default_rng(random.getrandbits(32))
+
+    for epoch in range(1, epochs + 1):
+        order = rng.permutation(len(targets))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start: start + batch_size]
+            x, y = contexts[batch], targets[batch]
+            rows = np.arange(len(batch))
+
+            inputs = embedding[x].reshape(len(batch), I)
+            hidden = np.tanh(inputs @ w1.T + b1)
+            logits = hidden @ w2.T + b2
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            total_loss -= np.log(np.maximum(probs[rows, y], 1e-9)).sum()
+
+            output_grad = probs
+            output_grad[rows, y] -= 1.0
+            output_grad *= lr
+            hidden_grad = (output_grad @ w2) * (1.0 - hidden * hidden)
+            embedding_grad = (hidden_grad @ w1).reshape(-1, D)
+
+            w2 -= output_grad.T @ hidden
+            b2 -= output_grad.sum(axis=0)
+            w1 -= hidden_grad.T @ inputs
+            b1 -= hidden_grad.sum(axis=0)
+            np.subtract.at(embedding, x.ravel(), embedding_grad)
+
+        report_epoch(epoch, epochs, total_loss / len(targets))
+
+    model.embedding_matrix = embedding.ravel().tolist()
+    model.hidden_weights   = w1.ravel().tolist()
+    model.hidden_bias      = b1.tolist()
+    model.output_weights   = w2.ravel().tolist()
+    model.output_bias      = b2.tolist()
 
 
 # ── entry point ────────────────────────────────────────────────────────────────
@@ -263,28 +418,46 @@ if __name__ == '__main__':
                               help='Training corpus — one SQL statement per line')
     train_parser.add_argument('--finetune', action='store_true',
                               help='Load existing weights and continue training')
-    train_parser.add_argument('--weights',  metavar='FILE', default=_WEIGHTS_PATH,
-                              help=f'Weights file to load for fine-tuning (default: {_WEIGHTS_PATH})')
-    train_parser.add_argument('--output',   metavar='FILE', default=_WEIGHTS_PATH,
-                              help=f'Where to save trained weights (default: {_WEIGHTS_PATH})')
+    train_parser.add_argument('--weights',  metavar='FILE', default=_default_weights_path(),
+                              help=f'Weights file to load for fine-tuning (default: {_default_weights_path()})')
+    train_parser.add_argument('--output',   metavar='FILE', default=_WEIGHTS_BIN_PATH,
+                              help=f'Where to save trained weights, .bin or .json (default: {_WEIGHTS_BIN_PATH})')
     train_parser.add_argument('--epochs',   type=int,   default=EPOCHS,
                               help=f'Training epochs (default: {EPOCHS})')
     train_parser.add_argument('--lr',       type=float, default=LEARNING_RATE,
                               help=f'Learning rate (default: {LEARNING_RATE})')
     train_parser.add_argument('--debug',    action='store_true',
                               help='Print tokenization output for each training sentence')
+    train_parser.add_argument('--trainer',  choices=('auto', 'numpy', 'python'), default='auto',
+                              help='numpy mini-batches or the per-sample python loop (default: numpy if installed)')
+    train_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, dest='batch_size',
+                              help=f'Mini-batch size for the numpy trainer (default: {BATCH_SIZE})')
+    train_parser.add_argument('--workers',  type=int, default=None,
+                              help='Tokenizer processes (default: CPU count)')
+    train_parser.add_argument('--no-token-cache', action='store_false', dest='token_cache',
+                              help='Do not read or write the on-disk token cache')
 
     infer_parser = subparsers.add_parser('infer', help='Run inference on a SQL prefix')
     infer_parser.add_argument('--sql',     required=True, metavar='TEXT',
                               help='SQL prefix to complete')
-    infer_parser.add_argument('--weights', metavar='FILE', default=_WEIGHTS_PATH,
-                              help=f'Weights file to load (default: {_WEIGHTS_PATH})')
+    infer_parser.add_argument('--weights', metavar='FILE', default=_default_weights_path(),
+                              help=f'Weights file to load (default: {_default_weights_path()})')
     infer_parser.add_argument('--top-k',  type=int, default=10, dest='top_k',
                               help='Number of predictions to show (default: 10)')
 
+    convert_parser = subparsers.add_parser('convert', help='Convert weights between JSON and binary')
+    convert_parser.add_argument('--weights', required=True, metavar='FILE',
+                                help='Weights file to read (.bin or .json)')
+    convert_parser.add_argument('--output',  required=True, metavar='FILE',
+                                help='Weights file to write; format follows the extension')
+
     args = parser.parse_args()
 
-    if args.command == 'infer':
+    if args.command == 'convert':
+        model, t2i, i2t = load_for_training(args.weights)
+        save_weights(model, t2i, i2t, args.output)
+
+    elif args.command == 'infer':
         model, t2i, i2t = _load_weights(args.weights)
         results = _predict_next(args.sql, model, t2i, i2t, _VOCAB_VALUES, top_k=args.top_k)
         for token, prob in results:
@@ -307,8 +480,19 @@ if __name__ == '__main__':
         print(f"Corpus: {len(corpus)} statements")
 
         vocab_values = set(t2i.keys())
-        training_data = make_dataset(corpus, t2i, vocab_values, debug=args.debug)
+        training_data = make_dataset(
+            corpus, t2i, vocab_values, debug=args.debug, workers=args.workers,
+            cache_path=_token_cache_path(vocab_values) if args.token_cache else None,
+        )
         print(f"Samples: {len(training_data)}  epochs: {args.epochs}  lr: {args.lr}")
 
-        train_loop(model, training_data, args.epochs, args.lr)
+        trainer = args.trainer
+        if trainer == 'auto':
+            trainer = 'numpy' if np is not None else 'python'
+        if trainer == 'numpy':
+            if np is None:
+                parser.error('--trainer numpy requires numpy')
+            train_loop_numpy(model, training_data, args.epochs, args.lr, args.batch_size)
+        else:
+            train_loop(model, training_data, args.epochs, args.lr)
         save_weights(model, t2i, i2t, args.output)